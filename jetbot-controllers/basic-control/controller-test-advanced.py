@@ -13,12 +13,14 @@
 Original content follows:
 """
 
+import queue
 import serial
+import threading
 import time
 
 # Serial port configuration
 SERIAL_PORT = "/dev/ttyACM0"  # Adjust for your system (e.g., "COM3" on Windows)
-BAUD_RATE = 9600
+BAUD_RATE = 115200  # Must match Serial.begin() in the firmware
 
 # Movement duration (seconds)
 MOVE_DURATION = 2  # Change this value if you want a different duration
@@ -42,15 +44,37 @@
     'g': [-225, -75, -225, -75]    # Curved Backward Right (Backward + slight right rotation)
 }
 
-def send_command(ser, speeds):
+# Command bytes for every entry, built once so the input loop does no formatting
+ENCODED = {k: (",".join(map(str, v)) + "\n").encode('utf-8') for k, v in COMMANDS.items()}
+ENCODED_STOP = b"0,0,0,0\n"
+
+def start_writer(ser):
     """
-    Format and send a command to the Arduino.
+    Start a daemon thread that owns all writes to the serial port.
     :param ser: The serial connection.
-    :param speeds: List of 4 integers representing motor speeds.
+    :return: (queue, thread); put encoded commands on the queue, None to stop the thread.
+    """
+    tx_queue = queue.SimpleQueue()
+
+    def writer():
+        while True:
+            cmd = tx_queue.get()
+            if cmd is None:
+                return
+            ser.write(cmd)
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    return tx_queue, thread
+
+def send_command(tx_queue, cmd):
+    """
+    Queue a command for the writer thread; returns without waiting on USB.
+    :param tx_queue: Queue returned by start_writer.
+    :param cmd: Encoded command from ENCODED (or ENCODED_STOP).
     """
-    cmd = ",".join(str(s) for s in speeds) + "\n"
-    ser.write(cmd.encode('utf-8'))
-    print("Sent command:", cmd.strip())
+    tx_queue.put(cmd)
+    print("Sent command:", cmd[:-1].decode('utf-8'))
 
 def main():
     try:
@@ -60,6 +84,7 @@ def main():
     except serial.SerialException as e:
         print("Error opening serial port:", e)
         return
+    tx_queue, writer_thread = start_writer(ser)
 
     print("Enter a direction command:")
     print("  w - Forward")
@@ -83,16 +108,18 @@ def main():
         if direction == "exit":
             break
 
-        if direction in COMMANDS:
+        if direction in ENCODED:
             # Send the movement command
-            send_command(ser, COMMANDS[direction])
+            send_command(tx_queue, ENCODED[direction])
             # Keep the motors running for MOVE_DURATION seconds
             time.sleep(MOVE_DURATION)
             # Send stop command (all motors off)
-            send_command(ser, [0, 0, 0, 0])
+            send_command(tx_queue, ENCODED_STOP)
         else:
             print("Invalid command. Please enter one of the valid commands.")
 
+    tx_queue.put(None)  # Writer exits once everything queued has been written
+    writer_thread.join(1.0)
     ser.close()
     print("Serial connection closed. Exiting...")
 
@@ -18,7 +18,7 @@
 
 # Serial port configuration
 SERIAL_PORT = "/dev/ttyACM0"  # Adjust for your system (e.g., "COM3" on Windows)
-BAUD_RATE = 9600
+BAUD_RATE = 115200  # Must match Serial.begin() in the firmware
 
 # Define motor commands for each direction.
 # These values are examples; adjust them according to your robot's motor configuration.
@@ -10,14 +10,18 @@
 from flask import Flask, render_template_string, request, jsonify
 from flask_socketio import SocketIO, emit
 import math
+import functools
+import os
+import pathlib
 import eventlet.semaphore # <--- Import Semaphore
 
 # --- Configuration ---
 SERIAL_PORT = '/dev/ttyACM0' # <--- SET YOUR SERIAL PORT HERE
 # SERIAL_PORT = None # Use None to attempt auto-detection
 
-BAUD_RATE = 9600
+BAUD_RATE = 115200 # Must match Serial.begin() in the firmware
 SERIAL_TIMEOUT = 0.1 # seconds
+PORT_CACHE_FILE = pathlib.Path('/tmp/jetbot_arduino_port') # Last auto-detected port that opened
 FLASK_HOST = '0.0.0.0'
 FLASK_PORT = 6002
 
@@ -50,6 +54,14 @@
 def find_arduino_port():
     # ... (keep find_arduino_port function as is) ...
     """Attempts to find a USB serial port likely connected to an Arduino."""
+    # Try the last port that opened before walking sysfs again
+    try:
+        cached = PORT_CACHE_FILE.read_text().strip()
+        if cached and os.path.exists(cached):
+            print(f"Using cached Arduino port: {cached}")
+            return cached
+    except OSError:
+        pass
     ports = serial.tools.list_ports.comports()
     # More specific keywords for common Arduino/clone types
     keywords = ['arduino', 'usb serial ch340', 'usb serial cp210x', 'ttyacm', 'ttyusb']
@@ -104,15 +116,19 @@ def connect_serial():
         except Exception as read_err:
             print(f"Warning: Error reading startup message: {read_err}")
 
+        if SERIAL_PORT is None:
+            PORT_CACHE_FILE.write_text(port_to_try)
         print(f"Serial connection established on {port_to_try}.")
         return True
     except serial.SerialException as e:
         print(f"Error opening serial port {port_to_try}: {e}")
         ser = None
+        PORT_CACHE_FILE.unlink(missing_ok=True) # Rescan next time
         return False
     except Exception as e:
         print(f"An unexpected error occurred during serial connection: {e}")
         ser = None
+        PORT_CACHE_FILE.unlink(missing_ok=True) # Rescan next time
         return False
 
 
@@ -161,7 +177,7 @@ def calculate_mecanum_speeds(vx, vy, omega):
     vx: forward/backward speed (+ forward)
     vy: strafing speed (+ left) - Note: Positive vy = Strafe LEFT
     omega: rotational speed (+ counter-clockwise / CCW)
-    Returns: [fl, fr, rl, rr] clamped to [-MAX_SPEED, MAX_SPEED]
+    Returns: (fl, fr, rl, rr) clamped to [-MAX_SPEED, MAX_SPEED]
     ORDER MUST MATCH ARDUINO: 0=FL, 1=FR, 2=RL, 3=RR
     """
     # --- Standard Mecanum Kinematics ---
@@ -198,7 +214,15 @@ def calculate_mecanum_speeds(vx, vy, omega):
     rl = max(-MAX_SPEED, min(MAX_SPEED, rl))
     rr = max(-MAX_SPEED, min(MAX_SPEED, rr))
 
-    return [fl, fr, rl, rr]
+    return (fl, fr, rl, rr)
+
+@functools.lru_cache(maxsize=256)
+def mecanum_command(vx, vy, omega):
+    """Returns the "fl,fr,rl,rr" command string for the given velocities.
+
+    Cached: inputs are integer PWM values, so held keys repeat the same call.
+    """
+    return "%d,%d,%d,%d" % calculate_mecanum_speeds(vx, vy, omega)
 
 def update_robot_movement():
     # ... (keep update_robot_movement function mostly as is, but remove debug prints if too noisy) ...
@@ -268,9 +292,7 @@ def update_robot_movement():
         send_command("0,0,0,0")
     elif not is_currently_stopped or not is_intentionally_stopped:
         # Calculate final speeds using kinematics
-        speeds = calculate_mecanum_speeds(current_vx, current_vy, current_omega)
-        cmd = f"{speeds[0]},{speeds[1]},{speeds[2]},{speeds[3]}"
-        send_command(cmd)
+        send_command(mecanum_command(current_vx, current_vy, current_omega))
 
 # --- Flask Routes ---
 
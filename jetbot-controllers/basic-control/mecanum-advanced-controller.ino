@@ -37,7 +37,7 @@
 
 // ======= Configuration Constants =======
 #define DEBUG_LEVEL 2            // 0=Off, 1=Basic, 2=Verbose
-#define SERIAL_BAUD 9600
+#define SERIAL_BAUD 115200
 #define STATUS_INTERVAL 500      // ms between status messages
 
 const uint8_t CMD_BUFFER_SIZE = 64;
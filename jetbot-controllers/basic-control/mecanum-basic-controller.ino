@@ -39,6 +39,25 @@
  *   • Motor 2: Rear Left
  *   • Motor 3: Rear Right
  * A positive value runs the motor forward (DIR HIGH) and negative reverses it.
+ * The line "PING" is answered with "READY", so a host that opened the port
+ * without resetting the board can still complete its handshake.
+ *
+ * Binary frames are also accepted (used by simple_square_app.py).
+ * Sync bytes are never valid ASCII, so both formats can share the serial line:
+ *   • 0xA5 + four big-endian int16 speeds + checksum (10 bytes): set speeds
+ *     immediately.
+ *   • 0xA6 + four big-endian int16 target speeds + big-endian uint16 ramp
+ *     time in ms + checksum (12 bytes): ramp linearly from the current speeds
+ *     to the targets. Any later speed command cancels a ramp in progress.
+ *   • 0xA7 + four big-endian int16 speeds + big-endian uint16 hold time in ms
+ *     + big-endian uint16 ramp time in ms + checksum (13 bytes): run a whole
+ *     segment - ramp up to the speeds, hold them, then ramp back down to 0.
+ *     Any later speed or ramp command cancels a segment in progress.
+ * The checksum is the XOR of every byte between the sync byte and itself;
+ * frames that fail it are dropped.
+ *
+ * A single 0xFE byte between frames is an ABORT: motors stop at once, any
+ * ramp is cancelled and a partially received command is discarded.
  */
 
 #include <Arduino.h>
@@ -70,7 +89,7 @@ Motor motors[4] = {
   {10, 11}   // Rear Right (Driver 2, channel 2)
 };
 
-const unsigned long BAUD_RATE = 9600;
+const unsigned long BAUD_RATE = 115200;  // ~87 us per byte on the wire
 const int NUM_MOTORS = 4;
 const int PWM_MAX = 255;
 
@@ -80,10 +99,56 @@ const int PWM_MAX = 255;
 char cmdBuffer[CMD_BUFFER_SIZE];  // Buffer to store incoming command
 int cmdIndex = 0;                 // Current position in the buffer
 
+// --- Binary Frame Settings ---
+
+#define BINARY_SYNC 0xA5                        // Marks the start of a speed frame
+#define RAMP_SYNC 0xA6                          // Marks the start of a ramp frame
+#define SEGMENT_SYNC 0xA7                       // Marks the start of a segment frame
+#define ABORT_BYTE 0xFE                         // Immediate stop, outside of any frame
+#define BINARY_PAYLOAD_SIZE (NUM_MOTORS * 2 + 1)  // Four big-endian int16 speeds + checksum
+#define RAMP_PAYLOAD_SIZE (NUM_MOTORS * 2 + 3)    // Four int16 targets + uint16 ramp ms + checksum
+#define SEGMENT_PAYLOAD_SIZE (NUM_MOTORS * 2 + 5) // Four int16 speeds + uint16 hold ms + uint16 ramp ms + checksum
+uint8_t binBuffer[SEGMENT_PAYLOAD_SIZE];        // Buffer for the binary payload (largest frame)
+uint8_t binSync = 0;                            // Sync byte of the frame being received
+int binLength = 0;                              // Payload size of the frame being received
+int binIndex = -1;                              // Position in binBuffer, -1 when not in a frame
+
+// --- Ramp State ---
+
+int currentSpeeds[NUM_MOTORS] = {0};    // Last speeds written to the motors
+int rampStart[NUM_MOTORS] = {0};        // Speeds when the ramp began
+int rampTarget[NUM_MOTORS] = {0};       // Speeds at the end of the ramp
+unsigned long rampStartMs = 0;          // millis() when the ramp began
+unsigned long rampDurationMs = 0;       // Total ramp time
+bool rampActive = false;
+
+// --- Segment State ---
+
+enum SegmentPhase {
+  SEGMENT_IDLE = 0,
+  SEGMENT_RAMP_UP,
+  SEGMENT_HOLD,
+  SEGMENT_RAMP_DOWN
+};
+
+SegmentPhase segmentPhase = SEGMENT_IDLE;
+unsigned long segmentHoldMs = 0;        // Time at full speed once the ramp up lands
+unsigned long segmentRampMs = 0;        // Duration of each ramp
+unsigned long holdStartMs = 0;          // millis() when the hold began
+
 // --- Function Prototypes ---
 void setupMotorPins();
 void processSerialInput();
 void handleCommand(const char* command);
+bool checksumValid(const uint8_t* payload, int length);
+void handleBinaryFrame(const uint8_t* payload);
+void handleRampFrame(const uint8_t* payload);
+void handleSegmentFrame(const uint8_t* payload);
+void startRamp(const int targets[NUM_MOTORS], unsigned long duration);
+void immediateStop();
+void updateRamp();
+void updateSegment();
+void applySpeeds(const int speeds[NUM_MOTORS]);
 bool parseCommand(const char* command, int speeds[NUM_MOTORS]);
 void setMotorSpeed(int index, int speed);
 void debugPrint(const char* msg);
@@ -100,12 +165,17 @@ void setup() {
     ; // Wait for the serial port to connect (needed for native USB)
   }
   Serial.println("Mecanum 4-Wheel Motor Controller Initialized");
+  Serial.println("READY");  // Host waits for this marker instead of a fixed delay
 }
 
 void loop() {
   // Process incoming serial data without blocking the main loop.
   processSerialInput();
 
+  // Advance any firmware-side ramp and segment.
+  updateRamp();
+  updateSegment();
+
   // Additional periodic tasks (e.g., sensor readings) can be added here.
 }
 
@@ -124,11 +194,46 @@ void setupMotorPins() {
  * processSerialInput()
  * Reads serial data one character at a time into a fixed buffer.
  * When a newline (or carriage return) is encountered, the complete command
- * is processed and the buffer is reset.
+ * is processed and the buffer is reset. A sync byte at the start of a line
+ * switches to collecting a fixed-size binary frame instead.
  */
 void processSerialInput() {
   while (Serial.available() > 0) {
-    char c = Serial.read();
+    uint8_t b = Serial.read();
+    // Inside a binary frame: collect payload bytes until complete.
+    if (binIndex >= 0) {
+      binBuffer[binIndex++] = b;
+      if (binIndex == binLength) {
+        if (!checksumValid(binBuffer, binLength)) {
+          Serial.println("Error: Binary frame checksum mismatch.");
+        } else if (binSync == RAMP_SYNC) {
+          handleRampFrame(binBuffer);
+        } else if (binSync == SEGMENT_SYNC) {
+          handleSegmentFrame(binBuffer);
+        } else {
+          handleBinaryFrame(binBuffer);
+        }
+        binIndex = -1;
+      }
+      continue;
+    }
+    if (b == ABORT_BYTE) {
+      immediateStop();
+      continue;
+    }
+    if ((b == BINARY_SYNC || b == RAMP_SYNC || b == SEGMENT_SYNC) && cmdIndex == 0) {
+      binSync = b;
+      if (b == SEGMENT_SYNC) {
+        binLength = SEGMENT_PAYLOAD_SIZE;
+      } else if (b == RAMP_SYNC) {
+        binLength = RAMP_PAYLOAD_SIZE;
+      } else {
+        binLength = BINARY_PAYLOAD_SIZE;
+      }
+      binIndex = 0;
+      continue;
+    }
+    char c = (char)b;
     // End of command detected.
     if (c == '\n' || c == '\r') {
       if (cmdIndex > 0) {
@@ -155,26 +260,219 @@ void processSerialInput() {
  *   command - A null-terminated C-string containing the command.
  */
 void handleCommand(const char* command) {
+  if (strcmp(command, "PING") == 0) {
+    Serial.println("READY");
+    return;
+  }
   int speeds[NUM_MOTORS] = {0};
   if (parseCommand(command, speeds)) {
-    // Update each motor with the parsed speed.
-    for (int i = 0; i < NUM_MOTORS; i++) {
-      setMotorSpeed(i, speeds[i]);
-    }
-    // Debug: Print the received speeds.
-    #if DEBUG
-    Serial.print("Set speeds: ");
-    for (int i = 0; i < NUM_MOTORS; i++) {
-      Serial.print(speeds[i]);
-      if (i < NUM_MOTORS - 1) Serial.print(", ");
-    }
-    Serial.println();
-    #endif
+    applySpeeds(speeds);
   } else {
     Serial.println("Error: Command parsing failed.");
   }
 }
 
+/*
+ * checksumValid()
+ * Checks that the last payload byte is the XOR of all bytes before it.
+ *
+ * Parameters:
+ *   payload - Bytes received after the sync byte.
+ *   length  - Number of bytes in payload, including the checksum.
+ */
+bool checksumValid(const uint8_t* payload, int length) {
+  uint8_t checksum = 0;
+  for (int i = 0; i < length - 1; i++) {
+    checksum ^= payload[i];
+  }
+  return checksum == payload[length - 1];
+}
+
+/*
+ * handleBinaryFrame()
+ * Decodes a binary payload of four big-endian int16 speeds and applies them.
+ *
+ * Parameters:
+ *   payload - BINARY_PAYLOAD_SIZE bytes received after the sync byte.
+ */
+void handleBinaryFrame(const uint8_t* payload) {
+  int speeds[NUM_MOTORS];
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    speeds[i] = (int16_t)((payload[2 * i] << 8) | payload[2 * i + 1]);
+  }
+  applySpeeds(speeds);
+}
+
+/*
+ * handleRampFrame()
+ * Starts a linear ramp from the current motor speeds to the decoded targets.
+ * The ramp itself is advanced by updateRamp() from loop().
+ *
+ * Parameters:
+ *   payload - RAMP_PAYLOAD_SIZE bytes received after the sync byte.
+ */
+void handleRampFrame(const uint8_t* payload) {
+  int targets[NUM_MOTORS];
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    targets[i] = (int16_t)((payload[2 * i] << 8) | payload[2 * i + 1]);
+  }
+  unsigned long duration = ((unsigned long)payload[2 * NUM_MOTORS] << 8) | payload[2 * NUM_MOTORS + 1];
+  if (duration == 0) {
+    applySpeeds(targets);
+    return;
+  }
+  segmentPhase = SEGMENT_IDLE;
+  startRamp(targets, duration);
+  #if DEBUG
+  Serial.print("Ramp to: ");
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    Serial.print(rampTarget[i]);
+    if (i < NUM_MOTORS - 1) Serial.print(", ");
+  }
+  Serial.print(" over ");
+  Serial.print(duration);
+  Serial.println(" ms");
+  #endif
+}
+
+/*
+ * handleSegmentFrame()
+ * Starts a segment: ramp up to the decoded speeds, hold, then ramp down to 0.
+ * The phases are advanced by updateSegment() from loop().
+ *
+ * Parameters:
+ *   payload - SEGMENT_PAYLOAD_SIZE bytes received after the sync byte.
+ */
+void handleSegmentFrame(const uint8_t* payload) {
+  int targets[NUM_MOTORS];
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    targets[i] = (int16_t)((payload[2 * i] << 8) | payload[2 * i + 1]);
+  }
+  segmentHoldMs = ((unsigned long)payload[2 * NUM_MOTORS] << 8) | payload[2 * NUM_MOTORS + 1];
+  segmentRampMs = ((unsigned long)payload[2 * NUM_MOTORS + 2] << 8) | payload[2 * NUM_MOTORS + 3];
+  startRamp(targets, segmentRampMs);
+  segmentPhase = SEGMENT_RAMP_UP;
+  #if DEBUG
+  Serial.print("Segment: ");
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    Serial.print(rampTarget[i]);
+    if (i < NUM_MOTORS - 1) Serial.print(", ");
+  }
+  Serial.print(" hold ");
+  Serial.print(segmentHoldMs);
+  Serial.print(" ms, ramp ");
+  Serial.print(segmentRampMs);
+  Serial.println(" ms");
+  #endif
+}
+
+/*
+ * startRamp()
+ * Begins a linear ramp from the current motor speeds to targets.
+ * A zero duration lands on the targets at the next updateRamp().
+ *
+ * Parameters:
+ *   targets  - Speeds for Front Left, Front Right, Rear Left, Rear Right.
+ *   duration - Ramp time in milliseconds.
+ */
+void startRamp(const int targets[NUM_MOTORS], unsigned long duration) {
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    rampStart[i] = currentSpeeds[i];
+    rampTarget[i] = constrain(targets[i], -PWM_MAX, PWM_MAX);
+  }
+  rampStartMs = millis();
+  rampDurationMs = duration;
+  rampActive = true;
+}
+
+/*
+ * immediateStop()
+ * Handles ABORT: stops all motors, cancels any ramp and resets the parser.
+ */
+void immediateStop() {
+  rampActive = false;
+  segmentPhase = SEGMENT_IDLE;
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    setMotorSpeed(i, 0);
+  }
+  cmdIndex = 0;
+  binIndex = -1;
+  debugPrint("Abort: motors stopped.");
+}
+
+/*
+ * updateRamp()
+ * Interpolates motor speeds for the active ramp, finishing exactly on target.
+ */
+void updateRamp() {
+  if (!rampActive) return;
+  unsigned long elapsed = millis() - rampStartMs;
+  if (elapsed >= rampDurationMs) {
+    rampActive = false;
+    for (int i = 0; i < NUM_MOTORS; i++) {
+      setMotorSpeed(i, rampTarget[i]);
+    }
+    return;
+  }
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    long delta = (long)(rampTarget[i] - rampStart[i]) * (long)elapsed / (long)rampDurationMs;
+    setMotorSpeed(i, rampStart[i] + (int)delta);
+  }
+}
+
+/*
+ * updateSegment()
+ * Moves the active segment to its next phase once the current one is done.
+ */
+void updateSegment() {
+  switch (segmentPhase) {
+    case SEGMENT_RAMP_UP:
+      if (!rampActive) {
+        holdStartMs = millis();
+        segmentPhase = SEGMENT_HOLD;
+      }
+      break;
+    case SEGMENT_HOLD:
+      if (millis() - holdStartMs >= segmentHoldMs) {
+        int zeros[NUM_MOTORS] = {0};
+        startRamp(zeros, segmentRampMs);
+        segmentPhase = SEGMENT_RAMP_DOWN;
+      }
+      break;
+    case SEGMENT_RAMP_DOWN:
+      if (!rampActive) {
+        segmentPhase = SEGMENT_IDLE;
+      }
+      break;
+    default:
+      break;
+  }
+}
+
+/*
+ * applySpeeds()
+ * Cancels any ramp or segment, updates each motor with its speed and optionally echoes the values.
+ *
+ * Parameters:
+ *   speeds - Signed speeds for Front Left, Front Right, Rear Left, Rear Right.
+ */
+void applySpeeds(const int speeds[NUM_MOTORS]) {
+  rampActive = false;
+  segmentPhase = SEGMENT_IDLE;
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    setMotorSpeed(i, speeds[i]);
+  }
+  // Debug: Print the received speeds.
+  #if DEBUG
+  Serial.print("Set speeds: ");
+  for (int i = 0; i < NUM_MOTORS; i++) {
+    Serial.print(speeds[i]);
+    if (i < NUM_MOTORS - 1) Serial.print(", ");
+  }
+  Serial.println();
+  #endif
+}
+
 /*
  * parseCommand()
  * Parses a command string formatted as "num,num,num,num" into an array of integers.
@@ -202,8 +500,9 @@ bool parseCommand(const char* command, int speeds[NUM_MOTORS]) {
  */
 void setMotorSpeed(int index, int speed) {
   if (index < 0 || index >= NUM_MOTORS) return;
+  speed = constrain(speed, -PWM_MAX, PWM_MAX);
+  currentSpeeds[index] = speed;
   int absSpeed = abs(speed);
-  absSpeed = constrain(absSpeed, 0, PWM_MAX);
   // Set direction: HIGH for forward, LOW for reverse.
   digitalWrite(motors[index].dirPin, (speed >= 0) ? HIGH : LOW);
   analogWrite(motors[index].pwmPin, absSpeed);
@@ -2,50 +2,116 @@
 import time
 import serial
 import serial.tools.list_ports
-from flask import Flask, render_template_string, request, jsonify
-from flask_cors import CORS  # Enable cross-origin requests
-import math
+from quart import Quart, Response, request, jsonify
+from quart_cors import cors  # Enable cross-origin requests
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+import asyncio
+import numpy as np
+import os
+import pathlib
+import struct
 import threading
-import ssl  # For HTTPS support
+import collections
+import queue
+import socket
+import select
+import datetime
+import gzip
+import hashlib
+import sys
+
+# Shared serial helpers live in utils/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'utils'))
+from serial_utils import enable_low_latency
 
 # --- Configuration ---
 # Set your serial port (adjust as needed)
 SERIAL_PORT = '/dev/ttyACM0'  # Example: '/dev/ttyUSB0' or 'COM3' on Windows
-BAUD_RATE = 9600
-SERIAL_TIMEOUT = 0.1  # Seconds
+BAUD_RATE = 115200  # Must match Serial.begin() in the firmware
+SERIAL_TIMEOUT = 0.01  # Seconds; nothing reads after the handshake, so keep any stray read short
+FRAME_SYNC = 0xA5  # First byte of a binary motor frame
+MOTOR_FRAME = struct.Struct('>BhhhhB')  # Sync byte + FL, FR, RL, RR as big-endian int16 + XOR checksum
+ABORT_BYTE = 0xFE  # Makes the firmware stop immediately, outside of any frame
+SEGMENT_SYNC = 0xA7  # First byte of a binary segment frame
+SEGMENT_FRAME = struct.Struct('>BhhhhHHB')  # Sync byte + FL, FR, RL, RR + hold (ms) + ramp (ms) + XOR checksum
+_pack_motor_frame = MOTOR_FRAME.pack
+_pack_segment_frame = SEGMENT_FRAME.pack
+PORT_CACHE_FILE = pathlib.Path('/tmp/jetbot_arduino_port')  # Last auto-detected port that opened
+# USB serial number of the Arduino to prefer during auto-detection (None = first match).
+# For a fixed path instead, add a udev rule (see README) and set SERIAL_PORT = '/dev/jetbot_arduino'.
+PREFERRED_SERIAL = None
+READY_MARKER = b"READY\n"  # Printed by the firmware at the end of setup()
+READY_TIMEOUT = 2.0  # Max seconds to wait for READY after opening the port
+READY_PROBE = b"PING\n"  # Makes an already-running sketch print READY again
+PROBE_INTERVAL = 0.1  # Seconds of silence before (re)sending READY_PROBE
+BANNER_IDLE_TIMEOUT = 0.02  # Once the banner has started, stop reading after this much silence
 FLASK_HOST = '0.0.0.0'
 FLASK_PORT = 6002
 USE_HTTPS = True  # Toggle to False for HTTP instead of HTTPS
+# Self-signed ECDSA P-256 cert, generated on first run and reused afterwards
+TLS_CERT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cert.pem')
+TLS_KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'key.pem')
+TLS_CERT_DAYS = 3650
 
 # Movement Parameters (Tune these!)
 MOVE_SPEED = 250       # Base speed (0-255)
 MAX_SPEED = 255
-RAMP_STEPS = 5         # Steps for ramp-up/down
-RAMP_DELAY = 0.05      # Seconds between ramp steps
+RAMP_TIME = 0.25       # Seconds for each ramp-up/down, interpolated by the Arduino
 TIME_PER_UNIT = 0.03   # Full speed time per unit
-STOP_REPEATS = 3       # Number of stop commands to send for reliability
+SEGMENT_PAUSE = 0.1    # Seconds stopped between square segments
+MAX_HOLD_MS = 0xFFFF   # Segment hold time is sent as uint16 milliseconds
+SQUARE_SEGMENTS = [(1, 0, 0), (0, 1, 0), (-1, 0, 0), (0, -1, 0)]  # Fwd, Right, Bwd, Left
+# Mecanum mixing matrix: rows FL, FR, RL, RR; columns vx, vy, omega
+MECANUM_MIX = np.array([[1, -1, -1], [1, 1, 1], [1, 1, -1], [1, -1, 1]], dtype=np.float64)
 
 # --- Global Variables ---
 ser = None  # Serial connection
-serial_lock = threading.Lock()  # Thread-safe serial access
-square_thread = None  # Movement thread
+ser_fd = None  # Raw file descriptor of ser, used by the writer thread (POSIX only)
+outbound = collections.deque(maxlen=64)  # Encoded frames waiting for the writer thread
+outbound_ready = threading.Event()  # Set when frames are queued
+writer_stop = threading.Event()  # Tells the writer thread to drain and exit
+writer_thread = None  # Only thread that calls ser.write
+square_jobs = queue.SimpleQueue()  # (units, stop_event) jobs for the square worker
+square_busy = threading.Event()  # Set while a square is queued or running
+square_worker = None  # Persistent thread that runs squares
 stop_event = threading.Event()  # Signal to stop
 
-# --- Flask App Setup ---
-app = Flask(__name__)
+# --- Quart App Setup ---
+app = Quart(__name__)
 app.config['SECRET_KEY'] = 'simple_square_secret!'
-CORS(app, resources={r"/*": {"origins": "*"}})  # Allow all origins
+app = cors(app, allow_origin="*")  # Allow all origins
 print("CORS enabled for all origins.")
 
 # --- Serial Communication Functions ---
 def find_arduino_port():
-    """Auto-detect Arduino USB port."""
-    ports = serial.tools.list_ports.comports()
+    """Auto-detect Arduino USB port.
+
+    A board matching PREFERRED_SERIAL always wins. Otherwise the last port that
+    opened is tried first, then the first port that looks like an Arduino.
+    """
+    if PREFERRED_SERIAL:
+        # Checked before the cache: a cached path may now belong to another device
+        ports = serial.tools.list_ports.comports()
+        for p in ports:
+            if p.serial_number == PREFERRED_SERIAL:
+                print(f"Found preferred Arduino: {p.device}")
+                return p.device
+        print(f"Warning: Preferred Arduino {PREFERRED_SERIAL} not found.")
+    else:
+        try:
+            cached = PORT_CACHE_FILE.read_text().strip()
+            if cached and os.path.exists(cached):
+                print(f"Using cached Arduino port: {cached}")
+                return cached
+        except OSError:
+            pass
+        ports = serial.tools.list_ports.comports()
     keywords = ['arduino', 'usb serial ch340', 'usb serial cp210x', 'ttyacm', 'ttyusb']
     arduino_ports = []
     print("Available ports:")
     for p in ports:
-        print(f"- {p.device}: {p.description}")
+        print(f"- {p.device}: {p.description} (serial {p.serial_number})")
         if any(keyword in p.description.lower() for keyword in keywords):
             arduino_ports.append(p.device)
     if arduino_ports:
@@ -54,9 +120,40 @@ def find_arduino_port():
     print("Warning: No Arduino port detected.")
     return None
 
+def read_startup_banner(ser):
+    """Read the boot banner until READY arrives or the line goes quiet.
+
+    Before the first byte we wait up to READY_TIMEOUT for the board to boot,
+    sending READY_PROBE every PROBE_INTERVAL so a board that did not reset
+    answers straight away. After that, sketches that never print READY are cut
+    off once nothing has arrived for BANNER_IDLE_TIMEOUT.
+    """
+    try:
+        fd = ser.fileno()
+    except (OSError, ValueError):  # io.UnsupportedOperation on Windows COM ports
+        fd = None
+    if fd is None or not hasattr(select, 'poll'):  # No pollable fd (Windows)
+        return ser.read_until(READY_MARKER, size=256)
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    banner = bytearray()
+    deadline = time.monotonic() + READY_TIMEOUT
+    while READY_MARKER not in banner:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        wait = min(remaining, BANNER_IDLE_TIMEOUT if banner else PROBE_INTERVAL)
+        if not poller.poll(wait * 1000):
+            if banner:
+                break
+            os.write(fd, READY_PROBE)  # Dropped by the bootloader if the board is resetting
+            continue
+        banner += os.read(fd, 4096)
+    return bytes(banner)
+
 def connect_serial():
     """Connect to the serial port."""
-    global ser, SERIAL_PORT
+    global ser, ser_fd, SERIAL_PORT
     if ser and ser.is_open:
         return True
     port = SERIAL_PORT if SERIAL_PORT else find_arduino_port()
@@ -65,120 +162,201 @@ def connect_serial():
         return False
     try:
         print(f"Connecting to {port} at {BAUD_RATE} baud...")
-        ser = serial.Serial(port, BAUD_RATE, timeout=SERIAL_TIMEOUT)
-        print("Waiting for Arduino to initialize...")
-        time.sleep(2)  # Allow Arduino to reset
-        startup = ser.read_all().decode('utf-8', errors='ignore').strip()
+        ser = serial.Serial(dsrdtr=False, timeout=READY_TIMEOUT)
+        ser.port = port
+        ser.baudrate = BAUD_RATE
+        # Suppress auto-reset on boards that honour DTR/RTS; READY_PROBE covers the
+        # missing boot banner. Set these to True if you rely on a reset per connect.
+        ser.dtr = False
+        ser.rts = False
+        ser.open()
+        if not enable_low_latency(ser, port):
+            print("Warning: Low-latency mode unavailable.")
+        print("Waiting for Arduino READY...")
+        startup = read_startup_banner(ser)
+        ser.timeout = SERIAL_TIMEOUT
+        if READY_MARKER not in startup:
+            print("Warning: No READY marker received, continuing anyway.")
+        startup = startup.decode('utf-8', errors='ignore').strip()
         if startup:
             print("--- Arduino Startup ---")
             print(startup)
             print("---------------------")
         ser.flushInput()
+        try:
+            ser_fd = ser.fileno()
+        except (AttributeError, OSError):
+            ser_fd = None  # No raw fd (Windows); the writer falls back to ser.write
+        start_serial_writer()
+        if not SERIAL_PORT:
+            PORT_CACHE_FILE.write_text(port)
         print(f"Connected to {port}.")
         return True
     except Exception as e:
         print(f"Serial connection failed: {e}")
         ser = None
+        PORT_CACHE_FILE.unlink(missing_ok=True)  # Rescan next time
+        return False
+
+def start_serial_writer():
+    """Start the writer thread if it is not already running."""
+    global writer_thread
+    if writer_thread and writer_thread.is_alive():
+        return
+    writer_stop.clear()
+    writer_thread = threading.Thread(target=_serial_writer, daemon=True)
+    writer_thread.start()
+
+def stop_serial_writer(timeout=1.0):
+    """Let the writer thread flush queued frames, then wait for it to exit."""
+    writer_stop.set()
+    outbound_ready.set()
+    if writer_thread:
+        writer_thread.join(timeout)
+
+def _serial_writer():
+    """Drain outbound frames to the serial port until writer_stop is set.
+
+    Everything queued since the last wakeup goes out in a single write, so a
+    burst of frames costs one syscall and as few USB packets as possible.
+    """
+    while True:
+        outbound_ready.wait()
+        outbound_ready.clear()
+        frames = []
+        while True:
+            try:
+                frames.append(outbound.popleft())
+            except IndexError:
+                break
+        if frames:
+            _write_frame(b''.join(frames))
+        if writer_stop.is_set():
+            return
+
+def send_command(payload):
+    """Queue an already-encoded frame for the writer thread."""
+    if not ser or not ser.is_open:
+        print("Serial not connected.")
         return False
+    outbound.append(payload)
+    outbound_ready.set()
+    return True
 
-def send_command(command):
-    """Send command to Arduino with thread safety."""
-    global ser, serial_lock
+def _write_frame(payload):
+    """Write payload to Arduino. Only called from the writer thread."""
+    global ser, ser_fd
     if not ser or not ser.is_open:
         print("Serial not connected.")
         return False
-    with serial_lock:
-        try:
-            ser.write((command + '\n').encode('utf-8'))
+    try:
+        if ser_fd is None:
+            ser.write(payload)
             return True
-        except Exception as e:
-            print(f"Serial send error: {e}")
-            try:
-                ser.close()
-            except:
-                pass
-            ser = None
-            return False
+        # Straight to the fd, skipping pyserial's per-call Python overhead
+        try:
+            written = os.write(ser_fd, payload)
+        except BlockingIOError:
+            written = 0
+        if written < len(payload):
+            ser.write(payload[written:])  # Kernel buffer full: let pyserial wait for room
+        return True
+    except Exception as e:
+        print(f"Serial send error: {e}")
+        try:
+            ser.close()
+        except:
+            pass
+        ser = None
+        ser_fd = None
+        return False
 
 def calculate_mecanum_speeds(vx, vy, omega):
-    """Compute wheel speeds for Mecanum drive."""
-    fl = vx - vy - omega
-    fr = vx + vy + omega
-    rl = vx + vy - omega
-    rr = vx - vy + omega
-    max_abs = max(abs(fl), abs(fr), abs(rl), abs(rr), 1)
-    scale = MAX_SPEED / max_abs if max_abs > MAX_SPEED else 1.0
+    """Compute wheel speeds for Mecanum drive.
+
+    Accepts scalars, or equal-length arrays to mix many commands at once, in
+    which case one [fl, fr, rl, rr] row is returned per command.
+    """
+    wheels = np.stack(np.broadcast_arrays(vx, vy, omega), axis=-1) @ MECANUM_MIX.T
+    max_abs = np.maximum(np.abs(wheels).max(axis=-1, keepdims=True), 1)
+    scale = np.where(max_abs > MAX_SPEED, MAX_SPEED / max_abs, 1.0)
+    return np.clip((wheels * scale).astype(np.int32), -MAX_SPEED, MAX_SPEED)
+
+def _frame_checksum(*values):
+    """XOR of the big-endian bytes of the given 16-bit frame fields."""
+    checksum = 0
+    for v in values:
+        checksum ^= ((v >> 8) & 0xFF) ^ (v & 0xFF)
+    return checksum
+
+def _encode_motor_speeds(fl, fr, rl, rr):
+    """Encode motor speeds as a fixed-size binary frame."""
+    fl, fr, rl, rr = int(fl), int(fr), int(rl), int(rr)
+    return _pack_motor_frame(FRAME_SYNC, fl, fr, rl, rr, _frame_checksum(fl, fr, rl, rr))
+
+def _encode_segment(fl, fr, rl, rr, hold_ms, ramp_ms):
+    """Encode a whole segment: ramp up, hold for hold_ms, then ramp back down to 0."""
+    fl, fr, rl, rr = int(fl), int(fr), int(rl), int(rr)
+    checksum = _frame_checksum(fl, fr, rl, rr, hold_ms, ramp_ms)
+    return _pack_segment_frame(SEGMENT_SYNC, fl, fr, rl, rr, hold_ms, ramp_ms, checksum)
+
+STOP_FRAME = _encode_motor_speeds(0, 0, 0, 0)  # Encoded once; sent on every stop path
+# ABORT stops the motors on arrival; the zero-speed frame behind it is a fallback
+STOP_SEQUENCE = bytes((ABORT_BYTE,)) + STOP_FRAME
+
+def _build_segment_speeds():
+    """Mix the wheel speeds for each square segment."""
+    commands = MOVE_SPEED * np.array(SQUARE_SEGMENTS, dtype=np.float64)
     return [
-        max(-MAX_SPEED, min(MAX_SPEED, int(fl * scale))),
-        max(-MAX_SPEED, min(MAX_SPEED, int(fr * scale))),
-        max(-MAX_SPEED, min(MAX_SPEED, int(rl * scale))),
-        max(-MAX_SPEED, min(MAX_SPEED, int(rr * scale)))
+        tuple(int(v) for v in speeds)
+        for speeds in calculate_mecanum_speeds(commands[:, 0], commands[:, 1], commands[:, 2])
     ]
 
-def _send_motor_speeds(fl, fr, rl, rr):
-    """Format and send motor speeds."""
-    cmd = f"{int(fl)},{int(fr)},{int(rl)},{int(rr)}"
-    print(f"Sending: {cmd}")  # Debug output
-    return send_command(cmd)
-
-def _safe_sleep(duration, event):
-    """Sleep with frequent stop checks."""
-    start = time.monotonic()
-    while time.monotonic() - start < duration:
-        if event.is_set():
-            return True
-        time.sleep(min(0.01, duration - (time.monotonic() - start)))  # Faster response
-    return event.is_set()
+SEGMENT_SPEEDS = _build_segment_speeds()  # Only timing depends on units, so mix once at import
+
+def send_stop():
+    """Drop any queued frames and queue the ABORT + stop sequence to go out next."""
+    outbound.clear()
+    return send_command(STOP_SEQUENCE)
+
+def _wait_until(deadline, event):
+    """Wait until the time.monotonic() deadline, waking immediately if event is set.
+
+    Returns True if stopped. A deadline already in the past returns at once,
+    so a late frame is sent straight away and the schedule catches up.
+    """
+    return event.wait(max(0.0, deadline - time.monotonic()))
 
 # --- Square Movement Logic ---
-def run_square_background(units, stop_event_ref):
-    """Execute square movement in a thread."""
-    global square_thread
-    print(f"Starting square: {units} units")
-    full_speed_time = max(0.1, units * TIME_PER_UNIT)
-    total_ramp_time = 2 * RAMP_STEPS * RAMP_DELAY
-    print(f"Segment duration: {full_speed_time + total_ramp_time:.2f}s")
+def plan_square(units):
+    """Plan the whole square as a list of (send_at_seconds, frame_bytes) tuples.
+
+    Each side is a single segment frame; the Arduino times the ramp up, hold
+    and ramp down itself. send_at is measured from the start of the square,
+    so the executor can wait on absolute deadlines and errors never accumulate.
+    """
+    hold_ms = min(MAX_HOLD_MS, round(max(0.1, units * TIME_PER_UNIT) * 1000))
+    ramp_ms = round(RAMP_TIME * 1000)
+    side_time = (hold_ms + 2 * ramp_ms) / 1000 + SEGMENT_PAUSE
+    plan = [
+        (i * side_time, _encode_segment(*speeds, hold_ms, ramp_ms))
+        for i, speeds in enumerate(SEGMENT_SPEEDS)
+    ]
+    plan.append((len(SEGMENT_SPEEDS) * side_time, STOP_FRAME))  # Square end
+    return plan
 
-    segments = [[1, 0, 0], [0, 1, 0], [-1, 0, 0], [0, -1, 0]]  # Fwd, Right, Bwd, Left
-    names = ["Forward", "Strafe Left", "Backward", "Strafe Right"]
+def run_square_background(units, stop_event_ref):
+    """Execute square movement on the square worker thread."""
+    plan = plan_square(units)
+    print(f"Starting square: {units} units, {len(plan)} frames, {plan[-1][0]:.2f}s")
 
     try:
-        for i, (vx_f, vy_f, omega_f) in enumerate(segments):
-            print(f"-- Segment {i+1}: {names[i]} --")
-
-            # Ramp Up
-            print("   Ramping up...")
-            for step in range(1, RAMP_STEPS + 1):
-                if stop_event_ref.is_set():
-                    raise InterruptedError("Stopped during ramp up")
-                speed = MOVE_SPEED * (step / RAMP_STEPS)
-                speeds = calculate_mecanum_speeds(speed * vx_f, speed * vy_f, 0)
-                if not _send_motor_speeds(*speeds):
-                    raise ConnectionError("Serial send failed")
-                time.sleep(RAMP_DELAY)
-
-            # Full Speed
-            print(f"   Moving full speed ({full_speed_time:.2f}s)...")
-            speeds = calculate_mecanum_speeds(MOVE_SPEED * vx_f, MOVE_SPEED * vy_f, 0)
-            if not _send_motor_speeds(*speeds):
+        start = time.monotonic()
+        for send_at, frame in plan:
+            if _wait_until(start + send_at, stop_event_ref):
+                raise InterruptedError("Stop requested")
+            if not send_command(frame):
                 raise ConnectionError("Serial send failed")
-            if _safe_sleep(full_speed_time, stop_event_ref):
-                raise InterruptedError("Stopped during full speed")
-
-            # Ramp Down
-            print("   Ramping down...")
-            for step in range(RAMP_STEPS - 1, -1, -1):
-                if stop_event_ref.is_set():
-                    raise InterruptedError("Stopped during ramp down")
-                speed = MOVE_SPEED * (step / RAMP_STEPS)
-                speeds = calculate_mecanum_speeds(speed * vx_f, speed * vy_f, 0)
-                _send_motor_speeds(*speeds)
-                time.sleep(RAMP_DELAY)
-
-            print("   Segment end.")
-            _send_motor_speeds(0, 0, 0, 0)
-            time.sleep(0.1)
-
         print("Square completed.")
     except InterruptedError as e:
         print(f"Interrupted: {e}")
@@ -186,52 +364,69 @@ def run_square_background(units, stop_event_ref):
         print(f"Error in square thread: {e}")
     finally:
         print("Stopping motors...")
-        for _ in range(STOP_REPEATS):
-            _send_motor_speeds(0, 0, 0, 0)
-            time.sleep(0.01)
-        square_thread = None
+        send_stop()
+        square_busy.clear()
         stop_event_ref.clear()
         print("Thread finished.")
 
-# --- Flask Routes ---
+def start_square_worker():
+    """Start the persistent thread that runs queued squares."""
+    global square_worker
+    if square_worker and square_worker.is_alive():
+        return
+    square_worker = threading.Thread(target=_square_worker, daemon=True)
+    square_worker.start()
+
+def _square_worker():
+    """Run squares from square_jobs one at a time, forever."""
+    while True:
+        units, stop_event_ref = square_jobs.get()
+        run_square_background(units, stop_event_ref)
+
+# --- Quart Routes ---
 @app.route('/')
-def index():
-    """Serve the control page with dark mode."""
-    return render_template_string(HTML_TEMPLATE)
+async def index():
+    """Serve the precompressed control page, or 304 if the browser already has it."""
+    headers = {'Cache-Control': 'max-age=3600', 'Vary': 'Accept-Encoding'}
+    # Each encoding has its own ETag; a 304 names the one the client already holds
+    for etag in (INDEX_ETAG_GZ, INDEX_ETAG):
+        if etag in request.if_none_match:
+            headers['ETag'] = f'"{etag}"'
+            return Response(status=304, headers=headers)
+    if 'gzip' in request.accept_encodings:
+        headers['ETag'] = f'"{INDEX_ETAG_GZ}"'
+        headers['Content-Encoding'] = 'gzip'
+        return Response(INDEX_HTML_GZ, mimetype='text/html', headers=headers)
+    headers['ETag'] = f'"{INDEX_ETAG}"'
+    return Response(INDEX_HTML, mimetype='text/html', headers=headers)
 
 @app.route('/start_square', methods=['POST'])
-def start_square_route():
+async def start_square_route():
     """Start square movement."""
-    global square_thread, stop_event
     if not ser or not ser.is_open:
         return jsonify(success=False, message="Serial not connected"), 503
-    if square_thread and square_thread.is_alive():
+    if square_busy.is_set():
         return jsonify(success=False, message="Movement in progress"), 409
     try:
-        units = int(request.get_json().get('units', 10))
+        units = int((await request.get_json()).get('units', 10))
         if units <= 0:
             return jsonify(success=False, message="Units must be positive"), 400
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, AttributeError):
         return jsonify(success=False, message="Invalid units"), 400
 
+    square_busy.set()
     stop_event.clear()
-    square_thread = threading.Thread(target=run_square_background, args=(units, stop_event), daemon=True)
-    square_thread.start()
+    square_jobs.put((units, stop_event))
     return jsonify(success=True, message=f"Square started ({units} units)")
 
 @app.route('/stop', methods=['POST'])
-def stop_route():
+async def stop_route():
     """Stop movement immediately."""
-    global square_thread, stop_event
     print(">>> Stop Requested <<<")
     stop_event.set()
     print("Sending stop commands...")
-    success = True
-    for _ in range(STOP_REPEATS):
-        if not _send_motor_speeds(0, 0, 0, 0):
-            success = False
-        time.sleep(0.01)
-    if square_thread:
+    success = send_stop()
+    if square_busy.is_set():
         print("Thread signaled to stop.")
     return jsonify(success=success, message="Stop command sent" if success else "Stop sent, serial may have failed")
 
@@ -360,33 +555,84 @@ def stop_route():
 </body>
 </html>
 """
+INDEX_HTML = HTML_TEMPLATE.encode('utf-8')
+INDEX_HTML_GZ = gzip.compress(INDEX_HTML, 9)
+INDEX_ETAG = hashlib.md5(INDEX_HTML).hexdigest()
+INDEX_ETAG_GZ = INDEX_ETAG + '-gz'  # Distinct validator for the gzip body
+
+# --- Server Socket ---
+def create_listen_socket(host, port):
+    """Create a listening TCP socket with SO_REUSEPORT so workers can share the port."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, 'SO_REUSEPORT'):  # Not available on Windows
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    return sock
+
+def ensure_tls_cert(cert_file=TLS_CERT_FILE, key_file=TLS_KEY_FILE):
+    """Return (cert, key) paths, generating a self-signed P-256 pair if missing."""
+    if os.path.exists(cert_file) and os.path.exists(key_file):
+        return cert_file, key_file
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    print("Generating self-signed ECDSA P-256 certificate...")
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, socket.gethostname())])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=TLS_CERT_DAYS))
+        .sign(key, hashes.SHA256())
+    )
+    with open(key_file, 'wb') as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ))
+    os.chmod(key_file, 0o600)
+    with open(cert_file, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    return cert_file, key_file
 
 # --- Main Execution ---
 if __name__ == '__main__':
     print("--- Mecanum Square Controller ---")
     if connect_serial():
+        start_square_worker()
         protocol = 'https' if USE_HTTPS else 'http'
         print(f"Starting server on {protocol}://{FLASK_HOST}:{FLASK_PORT}")
         if USE_HTTPS:
-            print("Using ad-hoc HTTPS. Browser may show a security warning.")
+            print("Using self-signed HTTPS. Browser may show a security warning.")
         try:
-            app.run(
-                host=FLASK_HOST,
-                port=FLASK_PORT,
-                debug=False,
-                threaded=True,
-                ssl_context='adhoc' if USE_HTTPS else None
-            )
+            listen_sock = create_listen_socket(FLASK_HOST, FLASK_PORT)
+            config = Config()
+            config.bind = [f"fd://{listen_sock.fileno()}"]
+            config.accesslog = None  # No per-request access log on stderr
+            if USE_HTTPS:
+                config.certfile, config.keyfile = ensure_tls_cert()
+            asyncio.run(serve(app, config))
         except Exception as e:
             print(f"Server error: {e}")
         finally:
             if ser and ser.is_open:
                 print("Shutting down, stopping motors...")
                 stop_event.set()
-                for _ in range(STOP_REPEATS):
-                    _send_motor_speeds(0, 0, 0, 0)
-                    time.sleep(0.01)
-                ser.close()
+                send_stop()
+                stop_serial_writer()
+                if ser:
+                    ser.flush()  # Block until the stop sequence has left the UART
+                    ser.close()
                 print("Serial closed.")
             print("Server stopped.")
     else:
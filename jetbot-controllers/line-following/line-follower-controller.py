@@ -14,16 +14,27 @@
 """
 
 import serial
-import time
 
 # Serial port configuration
 SERIAL_PORT = "/dev/ttyACM0"  # Adjust as needed (e.g., "/dev/ttyUSB0")
 BAUD_RATE = 115200            # Matches Arduino's baud rate
+READY_MARKER = b"READY\n"     # Printed by the firmware at the end of setup()
+READY_TIMEOUT = 2.0           # Max seconds to wait for READY after opening the port
+
+# Encoded payload for every accepted command, short and long forms
+COMMAND_BYTES = {
+    "f": b"forward\n", "forward": b"forward\n",
+    "b": b"backward\n", "backward": b"backward\n",
+    "s": b"stop\n", "stop": b"stop\n",
+}
 
 def main():
     try:
-        ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-        time.sleep(2)  # Wait for Arduino to initialize
+        ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=READY_TIMEOUT)
+        # Wait for Arduino to initialize; returns as soon as READY arrives
+        if READY_MARKER not in ser.read_until(READY_MARKER):
+            print("Warning: No READY marker received, continuing anyway.")
+        ser.timeout = 1
         print(f"Connected to Arduino on {SERIAL_PORT}")
     except serial.SerialException as e:
         print(f"Error opening serial port: {e}")
@@ -32,22 +43,14 @@ def main():
     print("Commands: 'f' or 'forward' (move forward), 'b' or 'backward' (move backward), 's' or 'stop' (stop)")
     print("Type 'exit' to quit")
 
-    command_map = {
-        "f": "forward",
-        "b": "backward",
-        "s": "stop",
-        "forward": "forward",
-        "backward": "backward",
-        "stop": "stop"
-    }
-
     while True:
         cmd = input("Enter command: ").strip().lower()
         if cmd == "exit":
             break
-        if cmd in command_map:
-            ser.write((command_map[cmd] + "\n").encode())
-            print(f"Sent: {command_map[cmd]}")
+        payload = COMMAND_BYTES.get(cmd)
+        if payload is not None:
+            ser.write(payload)
+            print(f"Sent: {payload.decode().strip()}")
         else:
             print("Invalid command")
 
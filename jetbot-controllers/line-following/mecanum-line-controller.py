@@ -38,10 +38,19 @@
 
 import serial
 import argparse
-import time
 import sys
 from typing import Optional
 
+# Encoded payload for every accepted command, short and long forms
+COMMAND_BYTES = {
+    'f': b'forward\n', 'forward': b'forward\n',
+    'b': b'backward\n', 'backward': b'backward\n',
+    's': b'stop\n', 'stop': b'stop\n',
+}
+RESPONSE_TIMEOUT = 0.05  # Seconds readline waits for the robot's reply
+READY_MARKER = b"READY\n"  # Printed by the firmware at the end of setup()
+READY_TIMEOUT = 2.0  # Max seconds to wait for READY after opening the port
+
 class RobotController:
     """Manages serial communication with the robot."""
     
@@ -54,8 +63,11 @@ def __init__(self, port: str, baud_rate: int):
     def connect(self) -> bool:
         """Establish serial connection to the robot."""
         try:
-            self.serial = serial.Serial(self.port, self.baud_rate, timeout=1)
-            time.sleep(2)  # Allow Arduino to reset
+            self.serial = serial.Serial(self.port, self.baud_rate, timeout=READY_TIMEOUT)
+            # Returns as soon as the Arduino finishes resetting, not after a fixed 2 s
+            if READY_MARKER not in self.serial.read_until(READY_MARKER):
+                print("Warning: No READY marker received, continuing anyway.")
+            self.serial.timeout = RESPONSE_TIMEOUT
             print(f"Connected to {self.port} at {self.baud_rate} baud")
             return True
         except serial.SerialException as e:
@@ -64,13 +76,13 @@ def connect(self) -> bool:
 
     def send_command(self, command: str) -> None:
         """Send a command to the robot."""
-        if self.serial and self.serial.is_open:
+        payload = COMMAND_BYTES.get(command)
+        if payload is None:
+            print(f"Error: Unknown command '{command}'")
+        elif self.serial and self.serial.is_open:
             try:
-                # Map short commands to full commands
-                command_map = {'f': 'forward', 'b': 'backward', 's': 'stop'}
-                full_command = command_map.get(command, command)
-                self.serial.write(f"{full_command}\n".encode('utf-8'))
-                print(f"Sent: {full_command}")
+                self.serial.write(payload)
+                print(f"Sent: {payload.decode().strip()}")
             except serial.SerialException as e:
                 print(f"Error sending command: {e}")
         else:
@@ -80,14 +92,14 @@ def close(self) -> None:
         """Close the serial connection."""
         if self.serial and self.serial.is_open:
             # Send stop command before closing to ensure robot halts
-            self.serial.write("stop\n".encode('utf-8'))
+            self.serial.write(COMMAND_BYTES['stop'])
             self.serial.close()
             print("Serial connection closed")
 
     def read_response(self) -> None:
-        """Read and display response from the robot."""
-        if self.serial and self.serial.in_waiting > 0:
-            response = self.serial.readline().decode('utf-8').strip()
+        """Read and display response from the robot, waiting up to RESPONSE_TIMEOUT."""
+        if self.serial and self.serial.is_open:
+            response = self.serial.readline().decode('utf-8', errors='ignore').strip()
             if response:
                 print(f"Robot: {response}")
 
@@ -118,9 +130,8 @@ def main():
             command = input("Enter command: ").strip().lower()
             if command == 'exit':
                 break
-            elif command in ['forward', 'f', 'backward', 'b', 'stop', 's']:
+            elif command in COMMAND_BYTES:
                 controller.send_command(command)
-                time.sleep(0.1)  # Brief delay to allow response
                 controller.read_response()
             else:
                 print("Invalid command. Use 'forward'/'f', 'backward'/'b', 'stop'/'s', or 'exit'")
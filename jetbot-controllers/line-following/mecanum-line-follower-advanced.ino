@@ -32,6 +32,7 @@
 #define LOOP_DELAY_MS 5       ///< Main loop delay in milliseconds
 #define INTEGRAL_LIMIT 100    ///< Limit for PID integral term
 #define UNIFORM_THRESHOLD 100 ///< Threshold for detecting uniform surface
+#define STREAM_MAX_SAMPLES 1000 ///< Upper bound on samples per STREAM_SENSORS request
 
 // --- Motor Configuration ---
 struct Motor {
@@ -90,6 +91,7 @@ void computePID(float position, float& correction);
 void setMotorSpeeds(int leftSpeed, int rightSpeed);
 void processSerialInput();
 void handleCommand(const char* command);
+void streamSensors(int samples);
 
 /**
  * @brief Initializes the Arduino and motor pins.
@@ -101,6 +103,7 @@ void setup() {
     ; // Wait for serial connection
   }
   Serial.println("Mecanum Line Follower Ready");
+  Serial.println("READY");  // Host waits for this marker instead of a fixed delay
 }
 
 /**
@@ -269,8 +272,30 @@ void handleCommand(const char* command) {
   } else if (strcmp(command, "stop") == 0) {
     direction = 0;
     Serial.println("Stopped");
+  } else if (strncmp(command, "STREAM_SENSORS,", 15) == 0) {
+    streamSensors(atoi(command + 15));
   } else {
     Serial.print("Unknown command: ");
     Serial.println(command);
   }
-} 
\ No newline at end of file
+} 
+
+/**
+ * @brief Streams raw sensor readings back-to-back for host-side calibration.
+ * @details Prints one "left,center,right" line per sample, unfiltered, so
+ *          sensor_utils.py gets every sample without a round trip each.
+ *          Motors are stopped first so the robot stays on the surface being measured.
+ * @param samples Number of readings to send (clamped to 1..STREAM_MAX_SAMPLES)
+ */
+void streamSensors(int samples) {
+  samples = constrain(samples, 1, STREAM_MAX_SAMPLES);
+  direction = 0;
+  setMotorSpeeds(0, 0);
+  for (int i = 0; i < samples; i++) {
+    Serial.print(analogRead(leftSensorPin));
+    Serial.print(',');
+    Serial.print(analogRead(centerSensorPin));
+    Serial.print(',');
+    Serial.println(analogRead(rightSensorPin));
+  }
+}
@@ -97,6 +97,7 @@ void setup() {
   // Start Serial communication for debugging
   Serial.begin(9600);
   Serial.println("Mecanum Line Follower Initialized");
+  Serial.println("READY");  // Host waits for this marker instead of a fixed delay
 }
 
 // --- Main Loop ---
@@ -6,6 +6,12 @@
  *
  * Features:
  * - Robust serial command parsing
+ * - Timed moves ("T,fl,fr,rl,rr,ms") that stop on-board when the time is up
+ * - Binary speed frames: 0xA5 + four big-endian int16 speeds + XOR checksum
+ *   (10 bytes, no sscanf). "BIN?" is answered with "BIN OK" so hosts can
+ *   detect support; CSV commands keep working alongside them.
+ * - On-board motor self-test ("SELFTEST" or "SELFTEST,ms"): runs each motor
+ *   in turn for ms (default 1000), pausing between motors, then prints "DONE"
  * - MPU6050-based straight-line drift correction
  * - Comprehensive error handling and status reporting
  * - Configurable PID control for motion correction
@@ -31,12 +37,17 @@
 #define DEBUG_LEVEL 1        // 0=Off, 1=Basic, 2=Verbose
 #define STATUS_INTERVAL 500  // Status message interval in ms (when DEBUG_LEVEL >= 2)
 
-const unsigned long BAUD_RATE = 9600;
+const unsigned long BAUD_RATE = 115200;  // ~87 us per byte on the wire
 const uint8_t CMD_BUFFER_SIZE = 64;
 const int16_t PWM_MAX = 255;
 const uint8_t NUM_MOTORS = 4;
 const float YAW_RATE_THRESHOLD = 0.5;  // Degrees/sec threshold to ignore noise
 const int16_t MAX_CORRECTION = 50;     // Maximum correction value
+const uint8_t BINARY_SYNC = 0xA5;                        // Marks the start of a binary speed frame
+const uint8_t BINARY_PAYLOAD_SIZE = NUM_MOTORS * 2 + 1;  // Four big-endian int16 speeds + XOR checksum
+const int16_t SELFTEST_SPEED = 100;                      // PWM for each motor during SELFTEST
+const unsigned long SELFTEST_DEFAULT_MS = 1000;          // Run time per motor when none is given
+const unsigned long SELFTEST_PAUSE_MS = 500;             // Stopped time between motors
 
 // =================== Type Definitions =================== //
 struct Motor {
@@ -57,6 +68,12 @@ struct SystemState {
   bool straightDriveActive;
   unsigned long lastStatusTime;
   unsigned long lastUpdateTime;
+  bool timedMoveActive;             // A "T," command is running
+  unsigned long timedMoveStart;     // millis() when it started
+  unsigned long timedMoveDuration;  // How long to run before stopping (ms)
+  int8_t selfTestStep;              // -1 when idle; even = motor step/2 running, odd = pause
+  unsigned long selfTestStepStart;  // millis() when the current step started
+  unsigned long selfTestRunMs;      // Run time per motor
 };
 
 struct PIDController {
@@ -98,11 +115,19 @@ SystemState state = {
   false,  // mpuInitialized
   false,  // straightDriveActive
   0,      // lastStatusTime
-  0       // lastUpdateTime
+  0,      // lastUpdateTime
+  false,  // timedMoveActive
+  0,      // timedMoveStart
+  0,      // timedMoveDuration
+  -1,     // selfTestStep
+  0,      // selfTestStepStart
+  0       // selfTestRunMs
 };
 
 char cmdBuffer[CMD_BUFFER_SIZE];
 uint8_t cmdIndex = 0;
+uint8_t binBuffer[BINARY_PAYLOAD_SIZE];
+int8_t binIndex = -1;  // Position in binBuffer, -1 when not in a frame
 
 // =================== Helper Functions =================== //
 bool checkSpeeds(const int16_t speeds[NUM_MOTORS], bool &allEqual, bool &allZero) {
@@ -128,6 +153,13 @@ void initializeMotors();
 bool initializeMPU();
 void processSerialCommands();
 bool parseMotorCommand(const char* cmd, int16_t speeds[NUM_MOTORS]);
+bool parseTimedCommand(const char* cmd, int16_t speeds[NUM_MOTORS], unsigned long &durationMs);
+bool parseSelfTestCommand(const char* cmd, unsigned long &runMs);
+void startSelfTest(unsigned long runMs);
+void updateSelfTest();
+void beginSelfTestStep();
+void applyDriveCommand(const int16_t speeds[NUM_MOTORS]);
+void handleBinaryFrame();
 void sendStatusMessage(const __FlashStringHelper* message, uint8_t level = 1);
 void sendStatusMessage(const char* message, uint8_t level = 1);
 void setMotorSpeeds(const int16_t speeds[NUM_MOTORS]);
@@ -158,6 +190,14 @@ void setup() {
 void loop() {
   processSerialCommands();
   
+  if (state.timedMoveActive && millis() - state.timedMoveStart >= state.timedMoveDuration) {
+    state.timedMoveActive = false;
+    int16_t zeroSpeeds[NUM_MOTORS] = { 0 };
+    applyDriveCommand(zeroSpeeds);
+    sendStatusMessage(F("Timed move complete"), 1);
+  }
+  updateSelfTest();
+  
   if (state.mpuInitialized) {
     updateIMUData();
     if (state.straightDriveActive) {
@@ -210,32 +250,35 @@ bool initializeMPU() {
 void processSerialCommands() {
   while (Serial.available() > 0) {
     char c = Serial.read();
+    if (binIndex >= 0) {
+      binBuffer[binIndex++] = (uint8_t)c;
+      if (binIndex == BINARY_PAYLOAD_SIZE) {
+        handleBinaryFrame();
+        binIndex = -1;
+      }
+      continue;
+    }
+    if ((uint8_t)c == BINARY_SYNC && cmdIndex == 0) {
+      binIndex = 0;
+      continue;
+    }
     if (c == '\n' || c == '\r') {
       if (cmdIndex > 0) {
         cmdBuffer[cmdIndex] = '\0';
         int16_t speeds[NUM_MOTORS] = { 0 };
-        if (parseMotorCommand(cmdBuffer, speeds)) {
-          bool allEqual, allZero;
-          checkSpeeds(speeds, allEqual, allZero);
-          if (allZero) {
-            state.straightDriveActive = false;
-            stopAllMotors();
-            sendStatusMessage(F("Motors stopped"), 1);
-          } else if (allEqual) {
-            yawAngle = 0.0;
-            pidController.integral = 0.0;
-            pidController.lastError = 0.0;
-            for (uint8_t i = 0; i < NUM_MOTORS; i++) {
-              baseMotorSpeeds[i] = speeds[i];
-            }
-            setMotorSpeeds(speeds);
-            state.straightDriveActive = true;
-            sendStatusMessage(F("Straight-drive mode activated"), 1);
-          } else {
-            state.straightDriveActive = false;
-            setMotorSpeeds(speeds);
-            sendStatusMessage(F("Normal drive command executed"), 2);
-          }
+        unsigned long durationMs = 0;
+        if (strcmp(cmdBuffer, "BIN?") == 0) {
+          Serial.println(F("BIN OK"));
+        } else if (parseSelfTestCommand(cmdBuffer, durationMs)) {
+          startSelfTest(durationMs);
+        } else if (parseTimedCommand(cmdBuffer, speeds, durationMs)) {
+          applyDriveCommand(speeds);
+          state.timedMoveStart = millis();
+          state.timedMoveDuration = durationMs;
+          state.timedMoveActive = true;
+        } else if (parseMotorCommand(cmdBuffer, speeds)) {
+          state.timedMoveActive = false;  // Any plain command overrides a timed move
+          applyDriveCommand(speeds);
         } else {
           sendStatusMessage(F("Error: Invalid command format"), 1);
         }
@@ -250,12 +293,101 @@ void processSerialCommands() {
   }
 }
 
+void applyDriveCommand(const int16_t speeds[NUM_MOTORS]) {
+  bool allEqual, allZero;
+  state.selfTestStep = -1;  // Any drive command ends a running self-test
+  checkSpeeds(speeds, allEqual, allZero);
+  if (allZero) {
+    state.straightDriveActive = false;
+    stopAllMotors();
+    sendStatusMessage(F("Motors stopped"), 1);
+  } else if (allEqual) {
+    yawAngle = 0.0;
+    pidController.integral = 0.0;
+    pidController.lastError = 0.0;
+    for (uint8_t i = 0; i < NUM_MOTORS; i++) {
+      baseMotorSpeeds[i] = speeds[i];
+    }
+    setMotorSpeeds(speeds);
+    state.straightDriveActive = true;
+    sendStatusMessage(F("Straight-drive mode activated"), 1);
+  } else {
+    state.straightDriveActive = false;
+    setMotorSpeeds(speeds);
+    sendStatusMessage(F("Normal drive command executed"), 2);
+  }
+}
+
+void handleBinaryFrame() {
+  uint8_t checksum = 0;
+  for (uint8_t i = 0; i < BINARY_PAYLOAD_SIZE - 1; i++) {
+    checksum ^= binBuffer[i];
+  }
+  if (checksum != binBuffer[BINARY_PAYLOAD_SIZE - 1]) {
+    sendStatusMessage(F("Error: Binary frame checksum mismatch"), 1);
+    return;
+  }
+  int16_t speeds[NUM_MOTORS];
+  for (uint8_t i = 0; i < NUM_MOTORS; i++) {
+    speeds[i] = (int16_t)((binBuffer[2 * i] << 8) | binBuffer[2 * i + 1]);
+  }
+  state.timedMoveActive = false;  // Same as a plain CSV command
+  applyDriveCommand(speeds);
+}
+
 bool parseMotorCommand(const char* cmd, int16_t speeds[NUM_MOTORS]) {
   int fields = sscanf(cmd, "%d,%d,%d,%d", 
                       &speeds[0], &speeds[1], &speeds[2], &speeds[3]);
   return (fields == NUM_MOTORS);
 }
 
+bool parseTimedCommand(const char* cmd, int16_t speeds[NUM_MOTORS], unsigned long &durationMs) {
+  if (cmd[0] != 'T' || cmd[1] != ',') return false;
+  int fields = sscanf(cmd + 2, "%d,%d,%d,%d,%lu",
+                      &speeds[0], &speeds[1], &speeds[2], &speeds[3], &durationMs);
+  return (fields == NUM_MOTORS + 1);
+}
+
+bool parseSelfTestCommand(const char* cmd, unsigned long &runMs) {
+  if (strncmp(cmd, "SELFTEST", 8) != 0) return false;
+  runMs = SELFTEST_DEFAULT_MS;
+  if (cmd[8] == '\0') return true;
+  return (cmd[8] == ',' && sscanf(cmd + 9, "%lu", &runMs) == 1);
+}
+
+void startSelfTest(unsigned long runMs) {
+  state.timedMoveActive = false;
+  state.straightDriveActive = false;
+  state.selfTestRunMs = runMs;
+  state.selfTestStep = 0;
+  beginSelfTestStep();
+}
+
+// Advances the self-test from loop(); timing comes from millis(), not the host
+void updateSelfTest() {
+  if (state.selfTestStep < 0) return;
+  unsigned long stepMs = (state.selfTestStep % 2 == 0) ? state.selfTestRunMs : SELFTEST_PAUSE_MS;
+  if (millis() - state.selfTestStepStart < stepMs) return;
+  state.selfTestStep++;
+  beginSelfTestStep();
+}
+
+void beginSelfTestStep() {
+  state.selfTestStepStart = millis();
+  if (state.selfTestStep >= NUM_MOTORS * 2) {
+    state.selfTestStep = -1;
+    Serial.println(F("DONE"));
+    return;
+  }
+  int16_t speeds[NUM_MOTORS] = { 0 };
+  if (state.selfTestStep % 2 == 0) {
+    speeds[state.selfTestStep / 2] = SELFTEST_SPEED;
+    Serial.print(F("SELFTEST motor "));
+    Serial.println(state.selfTestStep / 2);
+  }
+  setMotorSpeeds(speeds);
+}
+
 void sendStatusMessage(const __FlashStringHelper* message, uint8_t level) {
   if (DEBUG_LEVEL >= level) {
     Serial.println(message);
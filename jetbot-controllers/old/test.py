@@ -22,6 +22,13 @@
     'stop': [0, 0, 0, 0]                              # Stop
 }
 
+def encode_speeds(speeds):
+    """Format a speed list as the Arduino's "fl,fr,rl,rr\n" bytes."""
+    return (",".join(map(str, speeds)) + "\n").encode('utf-8')
+
+# Pre-encoded payloads for COMMANDS, built once at import
+COMMAND_BYTES = {key: encode_speeds(speeds) for key, speeds in COMMANDS.items()}
+
 # Calibration test sequence
 def calibration_test(ser):
     for i in range(4):
@@ -29,15 +36,15 @@ def calibration_test(ser):
         speeds[i] = DEFAULT_SPEED
         send_command(ser, speeds)
         time.sleep(MOVE_DURATION)
-        send_command(ser, [0, 0, 0, 0])
+        send_command(ser, COMMAND_BYTES['stop'])
         time.sleep(1)
     print("Calibration test complete.")
 
-# Send command to Arduino
+# Send command to Arduino (speed list, or bytes from COMMAND_BYTES)
 def send_command(ser, speeds):
-    cmd = ",".join(map(str, speeds)) + "\n"
-    ser.write(cmd.encode('utf-8'))
-    print(f"Sent command: {cmd.strip()}")
+    cmd = speeds if isinstance(speeds, bytes) else encode_speeds(speeds)
+    ser.write(cmd)
+    print(f"Sent command: {cmd.decode('utf-8').strip()}")
 
 # Main function
 def main():
@@ -58,9 +65,9 @@ def main():
         elif command == "calib":
             calibration_test(ser)
         elif command in COMMANDS:
-            send_command(ser, COMMANDS[command])
+            send_command(ser, COMMAND_BYTES[command])
             time.sleep(MOVE_DURATION)
-            send_command(ser, COMMANDS['stop'])
+            send_command(ser, COMMAND_BYTES['stop'])
         else:
             print("Invalid command.")
     
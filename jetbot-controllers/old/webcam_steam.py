@@ -17,25 +17,58 @@
 import logging
 import time
 import argparse
+import selectors
 import sys
 import signal
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from socketserver import ThreadingMixIn
+import os
+
+try:
+    from nvjpeg import NvJpeg  # pynvjpeg: JPEG encode on the Jetson's NVJPEG hardware
+except ImportError:
+    NvJpeg = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+JPEG_QUALITY = 90         # Quality passed to the JPEG encoder
+CAPTURE_RT_PRIORITY = 10  # SCHED_FIFO priority of the capture thread when --capture-cpu is set
+MJPEG_PART_PREFIX = b'--FRAME\r\nContent-Type: image/jpeg\r\nContent-Length: '  # Length, blank line and JPEG follow
+
+def make_jpeg_encoder(quality=JPEG_QUALITY):
+    """Return a function turning a BGR frame into JPEG bytes (None on failure).
+
+    Uses NVJPEG when pynvjpeg is installed and a GPU is present, else cv2.imencode.
+    """
+    if NvJpeg is not None:
+        try:
+            encoder = NvJpeg()
+            logger.info("Encoding JPEGs with NVJPEG")
+            return lambda frame: encoder.encode(frame, quality)
+        except Exception as e:
+            logger.warning(f"NVJPEG unavailable ({e}), encoding on the CPU")
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+    def encode(frame):
+        ok, jpeg = cv2.imencode('.jpg', frame, params)
+        return jpeg.tobytes() if ok else None
+    return encode
+
 class CameraHandler:
-    def __init__(self, device=0, video_size=(640, 480), fps=30):
+    def __init__(self, device=0, video_size=(640, 480), fps=30, camera_mjpeg=False, capture_cpu=None):
         self.device = device
         self.video_size = video_size
         self.fps = fps
+        self.camera_mjpeg = camera_mjpeg  # Pass the camera's own JPEGs through instead of encoding
+        self.capture_cpu = capture_cpu  # Core to pin the capture thread to, or None
         self.is_running = False
         self.lock = threading.Lock()
-        self.frame = None
+        self.on_frame = None  # Called (from the camera thread) after each new frame is stored
+        self.jpeg_bytes = None  # Latest frame, encoded once and shared by every client
+        self.frame_id = 0  # Increases with each new frame
         self.camera = None
         self.thread = None
+        self.encode = None
 
     def start(self):
         if self.is_running:
@@ -43,14 +76,23 @@ def start(self):
             return
 
         try:
-            self.camera = cv2.VideoCapture(self.device)
+            if self.camera_mjpeg:
+                self.camera = cv2.VideoCapture(self.device, cv2.CAP_V4L2)
+            else:
+                self.camera = cv2.VideoCapture(self.device)
             if not self.camera.isOpened():
                 raise RuntimeError(f"Failed to open camera device {self.device}")
             
+            if self.camera_mjpeg:
+                # Ask for MJPEG and skip OpenCV's decode, so read() returns the JPEG itself
+                self.camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                self.camera.set(cv2.CAP_PROP_CONVERT_RGB, 0)
             self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.video_size[0])
             self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.video_size[1])
             self.camera.set(cv2.CAP_PROP_FPS, self.fps)
             
+            if not self.camera_mjpeg:
+                self.encode = make_jpeg_encoder()
             self.is_running = True
             self.thread = threading.Thread(target=self._update_frame, daemon=True)
             self.thread.start()
@@ -62,7 +104,21 @@ def start(self):
             self.is_running = False
             raise
 
+    def _make_realtime(self):
+        """Pin the calling (capture) thread to capture_cpu and give it SCHED_FIFO priority.
+
+        Best effort: SCHED_FIFO needs root or CAP_SYS_NICE, and neither call exists off Linux.
+        """
+        try:
+            os.sched_setaffinity(0, {self.capture_cpu})
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(CAPTURE_RT_PRIORITY))
+            logger.info(f"Capture thread pinned to CPU {self.capture_cpu} with SCHED_FIFO")
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not make the capture thread real-time: {e}")
+
     def _update_frame(self):
+        if self.capture_cpu is not None:
+            self._make_realtime()
         while self.is_running:
             try:
                 ret, frame = self.camera.read()
@@ -70,20 +126,27 @@ def _update_frame(self):
                     logger.warning("Failed to get frame from camera")
                     time.sleep(0.1)
                     continue
-                    
+                
+                if self.camera_mjpeg:
+                    jpeg_bytes = frame.tobytes()  # Already a JPEG from the camera
+                else:
+                    # Encode once here rather than once per client, outside the lock
+                    jpeg_bytes = self.encode(frame)
+                if not jpeg_bytes:
+                    continue
                 with self.lock:
-                    self.frame = frame
+                    self.jpeg_bytes = jpeg_bytes
+                    self.frame_id += 1
+                if self.on_frame:
+                    self.on_frame()
             except Exception as e:
                 logger.error(f"Error in camera loop: {e}")
                 time.sleep(0.1)
 
     def get_frame(self):
+        """Return (frame_id, jpeg_bytes) for the latest frame; jpeg_bytes is None before the first."""
         with self.lock:
-            if self.frame is None:
-                return None
-            # Create a jpeg from the frame
-            _, jpeg = cv2.imencode('.jpg', self.frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-            return jpeg.tobytes()
+            return self.frame_id, self.jpeg_bytes
 
     def stop(self):
         self.is_running = False
@@ -93,84 +156,213 @@ def stop(self):
             self.camera.release()
         logger.info("Camera stopped")
 
-class StreamingHandler(BaseHTTPRequestHandler):
-    def __init__(self, camera_handler, *args, **kwargs):
+INDEX_HTML = b'''
+<html>
+<head>
+    <title>Live Camera Feed</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            margin: 20px;
+            text-align: center;
+        }
+        h1 {
+            color: #333;
+        }
+        img {
+            max-width: 100%;
+            border: 1px solid #ddd;
+            border-radius: 4px;
+            padding: 5px;
+        }
+    </style>
+</head>
+<body>
+    <h1>Live Camera Feed</h1>
+    <img src="/stream" alt="Live Video Stream">
+</body>
+</html>
+'''
+INDEX_RESPONSE = (b'HTTP/1.0 200 OK\r\nContent-Type: text/html\r\nContent-Length: %d\r\n\r\n'
+                  % len(INDEX_HTML)) + INDEX_HTML
+STREAM_HEADERS = (b'HTTP/1.0 200 OK\r\n'
+                  b'Age: 0\r\n'
+                  b'Cache-Control: no-cache, private\r\n'
+                  b'Pragma: no-cache\r\n'
+                  b'Content-Type: multipart/x-mixed-replace; boundary=FRAME\r\n\r\n')
+NOT_FOUND_RESPONSE = b'HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\n\r\n'
+MAX_REQUEST_SIZE = 8192  # Bytes of request headers accepted before the client is dropped
+
+class StreamClient:
+    """Per-connection state for StreamServer."""
+    def __init__(self, sock):
+        self.sock = sock
+        self.request = bytearray()  # Request bytes until the blank line arrives
+        self.streaming = False  # True once /stream headers are queued
+        self.close_after_send = False
+        self.pending = []  # memoryviews still to send
+        self.last_id = 0  # Last frame queued to this client
+
+class StreamServer:
+    """Serves the page and MJPEG stream to every client from one selector thread.
+
+    The camera thread only wakes the selector; each client socket is non-blocking
+    and a client still sending the previous frame skips the new one.
+    """
+    def __init__(self, address, camera_handler):
         self.camera_handler = camera_handler
-        super().__init__(*args, **kwargs)
-    
-    def do_GET(self):
-        if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            html = f'''
-            <html>
-            <head>
-                <title>Live Camera Feed</title>
-                <meta name="viewport" content="width=device-width, initial-scale=1">
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        margin: 20px;
-                        text-align: center;
-                    }}
-                    h1 {{
-                        color: #333;
-                    }}
-                    img {{
-                        max-width: 100%;
-                        border: 1px solid #ddd;
-                        border-radius: 4px;
-                        padding: 5px;
-                    }}
-                </style>
-            </head>
-            <body>
-                <h1>Live Camera Feed</h1>
-                <img src="/stream" alt="Live Video Stream">
-            </body>
-            </html>
-            '''.encode('utf-8')
-            self.wfile.write(html)
-            
-        elif self.path == '/stream':
-            self.send_response(200)
-            self.send_header('Age', 0)
-            self.send_header('Cache-Control', 'no-cache, private')
-            self.send_header('Pragma', 'no-cache')
-            self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=FRAME')
-            self.end_headers()
+        self.sel = selectors.DefaultSelector()
+        self.listen_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listen_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listen_sock.bind(address)
+        self.listen_sock.listen()
+        self.listen_sock.setblocking(False)
+        self.sel.register(self.listen_sock, selectors.EVENT_READ, self._accept)
+        # The camera thread writes a byte here for each new frame
+        self.wake_recv, self.wake_send = socket.socketpair()
+        self.wake_recv.setblocking(False)
+        self.wake_send.setblocking(False)
+        self.sel.register(self.wake_recv, selectors.EVENT_READ, self._on_wake)
+        self.clients = {}  # socket -> StreamClient
+        self.running = False
+
+    def serve_forever(self):
+        self.running = True
+        while self.running:
+            for key, mask in self.sel.select(timeout=1.0):
+                key.data(key.fileobj, mask)
+
+    def wake(self):
+        """Called from the camera thread when a new frame is stored."""
+        try:
+            self.wake_send.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # A wake-up is already pending, or the server is closed
+
+    def shutdown(self):
+        self.running = False
+        self.wake()
+
+    def server_close(self):
+        for client in list(self.clients.values()):
+            self._close(client)
+        self.sel.close()
+        self.listen_sock.close()
+        self.wake_recv.close()
+        self.wake_send.close()
+
+    def _accept(self, sock, mask):
+        try:
+            conn, _ = sock.accept()
+        except BlockingIOError:
+            return
+        conn.setblocking(False)
+        client = StreamClient(conn)
+        self.clients[conn] = client
+        self.sel.register(conn, selectors.EVENT_READ, lambda s, m: self._on_client(client, m))
+
+    def _on_wake(self, sock, mask):
+        try:
+            sock.recv(4096)  # Drain; several frames may have been signalled
+        except BlockingIOError:
+            pass
+        frame_id, frame = self.camera_handler.get_frame()
+        if frame is None:
+            return
+        header = b'%s%d\r\n\r\n' % (MJPEG_PART_PREFIX, len(frame))
+        for client in list(self.clients.values()):
+            # A client still sending an older frame skips this one
+            if client.streaming and not client.pending and client.last_id != frame_id:
+                client.last_id = frame_id
+                self._queue(client, header, frame, b'\r\n')
+
+    def _on_client(self, client, mask):
+        if mask & selectors.EVENT_READ:
             try:
-                while True:
-                    frame = self.camera_handler.get_frame()
-                    if frame is None:
-                        time.sleep(0.1)
-                        continue
-                        
-                    self.wfile.write(b'--FRAME\r\n')
-                    self.wfile.write(b'Content-Type: image/jpeg\r\n')
-                    self.wfile.write(f'Content-Length: {len(frame)}\r\n\r\n'.encode())
-                    self.wfile.write(frame)
-                    self.wfile.write(b'\r\n')
-            except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
-                logger.info("Client disconnected")
-            except Exception as e:
-                logger.error(f"Error streaming: {e}")
+                data = client.sock.recv(4096)
+            except BlockingIOError:
+                data = None
+            except OSError:
+                data = b''
+            if data == b'':
+                if client.streaming:
+                    logger.info("Client disconnected")
+                self._close(client)
+                return
+            if data and not client.streaming and not client.close_after_send:
+                client.request += data
+                if b'\r\n\r\n' in client.request:
+                    self._handle_request(client)
+                elif len(client.request) > MAX_REQUEST_SIZE:
+                    self._close(client)
+                    return
+        if mask & selectors.EVENT_WRITE and client.sock in self.clients:
+            self._flush(client)
+
+    def _handle_request(self, client):
+        request_line = bytes(client.request).split(b'\r\n', 1)[0].split()
+        path = request_line[1] if len(request_line) >= 2 else b''
+        if path == b'/':
+            client.close_after_send = True
+            self._queue(client, INDEX_RESPONSE)
+        elif path == b'/stream':
+            client.streaming = True
+            self._queue(client, STREAM_HEADERS)
         else:
-            self.send_error(404)
-            self.end_headers()
+            client.close_after_send = True
+            self._queue(client, NOT_FOUND_RESPONSE)
 
-class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
-    """Handle requests in a separate thread."""
-    pass
+    def _queue(self, client, *buffers):
+        client.pending.extend(memoryview(b) for b in buffers)
+        self._flush(client)
+
+    def _flush(self, client):
+        """Send as much pending data as the socket takes without blocking."""
+        sock = client.sock
+        pending = client.pending
+        while pending:
+            try:
+                if hasattr(sock, 'sendmsg'):
+                    sent = sock.sendmsg(pending)  # Gathered send; the JPEG is never copied
+                else:
+                    sent = sock.send(pending[0])  # No sendmsg on Windows
+            except BlockingIOError:
+                break
+            except OSError:
+                logger.info("Client disconnected")
+                self._close(client)
+                return
+            while pending and sent >= len(pending[0]):
+                sent -= len(pending[0])
+                pending.pop(0)
+            if pending:
+                pending[0] = pending[0][sent:]
+        if pending:
+            self.sel.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, self.sel.get_key(sock).data)
+        elif client.close_after_send:
+            self._close(client)
+        elif self.sel.get_key(sock).events & selectors.EVENT_WRITE:
+            self.sel.modify(sock, selectors.EVENT_READ, self.sel.get_key(sock).data)
+
+    def _close(self, client):
+        self.clients.pop(client.sock, None)
+        try:
+            self.sel.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
 
 class WebcamStreamer:
-    def __init__(self, port=8000, device=0, width=640, height=480, fps=30):
+    def __init__(self, port=8000, device=0, width=640, height=480, fps=30, camera_mjpeg=False,
+                 capture_cpu=None):
         self.port = port
         self.device = device
         self.width = width
         self.height = height
         self.fps = fps
+        self.camera_mjpeg = camera_mjpeg
+        self.capture_cpu = capture_cpu
         self.camera_handler = None
         self.server = None
         self.server_thread = None
@@ -184,15 +376,15 @@ def start(self):
             self.camera_handler = CameraHandler(
                 device=self.device,
                 video_size=(self.width, self.height),
-                fps=self.fps
+                fps=self.fps,
+                camera_mjpeg=self.camera_mjpeg,
+                capture_cpu=self.capture_cpu
             )
             self.camera_handler.start()
             
-            # Create a custom handler with access to the camera handler
-            handler = lambda *args: StreamingHandler(self.camera_handler, *args)
-            
-            # Start server
-            self.server = ThreadedHTTPServer(('0.0.0.0', self.port), handler)
+            # Start server; one thread serves every client
+            self.server = StreamServer(('0.0.0.0', self.port), self.camera_handler)
+            self.camera_handler.on_frame = self.server.wake
             self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.server_thread.start()
             
@@ -227,11 +419,13 @@ def stop(self):
         if self.server:
             logger.info("Shutting down server...")
             self.server.shutdown()
-            self.server.server_close()
             
         if self.server_thread and self.server_thread.is_alive():
             self.server_thread.join(timeout=5)
             
+        if self.server:
+            self.server.server_close()
+            
         logger.info("Server stopped")
 
 def parse_args():
@@ -241,6 +435,10 @@ def parse_args():
     parser.add_argument('--width', type=int, default=640, help="Video width (default: 640)")
     parser.add_argument('--height', type=int, default=480, help="Video height (default: 480)")
     parser.add_argument('--fps', type=int, default=30, help="Frames per second (default: 30)")
+    parser.add_argument('--camera-mjpeg', action='store_true',
+                        help="Stream the camera's own MJPEG output instead of encoding on the CPU")
+    parser.add_argument('--capture-cpu', type=int, default=None,
+                        help="Pin the capture thread to this CPU at real-time priority (needs CAP_SYS_NICE)")
     return parser.parse_args()
 
 def main():
@@ -250,7 +448,9 @@ def main():
         device=args.device,
         width=args.width,
         height=args.height,
-        fps=args.fps
+        fps=args.fps,
+        camera_mjpeg=args.camera_mjpeg,
+        capture_cpu=args.capture_cpu
     )
     
     def signal_handler(sig, frame):
@@ -15,65 +15,94 @@
 - Custom command entry.
 
 Usage:
-  python mecanum_controller.py [-p PORT] [-s SPEED] [-d DURATION]
+  python mecanum_controller.py [-p PORT] [-b BAUD] [-s SPEED] [-d DURATION]
 
 Author: Combined Example
 Version: 2.0
 """
 
 import argparse
+import os
+import numpy as np
+import queue
+import selectors
 import serial
+import struct
 import sys
 import time
 import threading
 
+# Shared serial helpers live in utils/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'utils'))
+from serial_utils import enable_low_latency, read_line
+
 # =================== Configuration =================== #
 DEFAULT_SERIAL_PORT = "/dev/ttyACM0"  # Adjust for your system (e.g., "COM3" on Windows)
-DEFAULT_BAUD_RATE = 9600
+DEFAULT_BAUD_RATE = 115200        # Must match BAUD_RATE in jetbot_imu_v2.1.ino; ~1.7 ms per CSV command vs ~20 ms at 9600
 DEFAULT_MOVE_DURATION = 2.0       # Default duration for momentary movements (seconds)
 DEFAULT_MOTOR_SPEED = 150         # Default speed value (0-255)
-SERIAL_TIMEOUT = 1.0              # Serial read timeout
+SERIAL_TIMEOUT = 0.05             # Serial read timeout; keeps readline from stalling on silence
 CONNECTION_RETRIES = 3            # Number of connection attempts
+BINARY_PROBE = b"BIN?\n"          # Firmware that accepts binary speed frames answers BINARY_REPLY
+BINARY_REPLY = "BIN OK"
+NEGOTIATE_TIMEOUT = 0.5           # Seconds to wait for BINARY_REPLY before staying on CSV
+FRAME_SYNC = 0xA5                 # First byte of a binary speed frame
+HOLD_RESEND_RATE = 50             # Hz; hold re-sends its command so a dropped packet can't stall it
 
 # =================== Command Definitions =================== #
 # Each command defines the speeds for [Front Left, Front Right, Rear Left, Rear Right]
 # Positive values move forward/right, negative values move backward/left.
 class Commands:
+    # Per-wheel multipliers in tenths of the speed, one row per direction key.
+    # Curved rows use 15 and 5 (1.5x and 0.5x speed).
+    KEYS = ('w', 's', 'a', 'd', 'q', 'e', 'z', 'x', 'c', 'v', 'r', 't', 'f', 'g')
+    SPEED_TABLE = np.array([
+        # Basic movements (with drift correction for forward/backward)
+        [10, 10, 10, 10],          # w: Forward
+        [-10, -10, -10, -10],      # s: Backward
+        [-10, 10, 10, -10],        # a: Strafe Left
+        [10, -10, -10, 10],        # d: Strafe Right
+        # Rotational movements
+        [10, -10, 10, -10],        # q: Rotate Left (CCW)
+        [-10, 10, -10, 10],        # e: Rotate Right (CW)
+        # Diagonal movements
+        [0, 10, 10, 0],            # z: Diagonal Forward Left
+        [10, 0, 0, 10],            # x: Diagonal Forward Right
+        [0, -10, -10, 0],          # c: Diagonal Backward Left
+        [-10, 0, 0, -10],          # v: Diagonal Backward Right
+        # Curved movements
+        [15, 5, 15, 5],            # r: Curved Forward Left
+        [5, 15, 5, 15],            # t: Curved Forward Right
+        [-5, -15, -5, -15],        # f: Curved Backward Left
+        [-15, -5, -15, -5],        # g: Curved Backward Right
+    ], dtype=np.int16)
+    # Row of each command in the table; fixed, so speed changes never touch the keys
+    KEY_INDEX = {key: i for i, key in enumerate(KEYS + ('stop',))}
+    MOVE_KEYS = frozenset(KEYS)  # Valid movement directions; 'stop' is a row, not a direction
+
     def __init__(self, speed=DEFAULT_MOTOR_SPEED):
         self.speed = speed
+        self.encoder = encode_speeds  # Turns a speed row into command bytes
+        # Speeds for every command in one contiguous block; the last row is stop
+        self.table = np.zeros((len(self.KEYS) + 1, 4), dtype=np.int16)
+        # Each value is a view of its table row, so it follows speed changes
+        self.COMMANDS = dict(zip(self.KEY_INDEX, self.table))
+        self.ENCODED = dict.fromkeys(self.KEY_INDEX)  # Values refilled by update_commands
         self.update_commands()
         
     def update_commands(self):
         """Update all commands based on current speed setting."""
-        self.COMMANDS = {
-            # Basic movements (with drift correction for forward/backward)
-            'w': [self.speed, self.speed, self.speed, self.speed],           # Forward
-            's': [-self.speed, -self.speed, -self.speed, -self.speed],        # Backward
-            'a': [-self.speed, self.speed, self.speed, -self.speed],          # Strafe Left
-            'd': [self.speed, -self.speed, -self.speed, self.speed],          # Strafe Right,
-            
-            # Rotational movements
-            'q': [self.speed, -self.speed, self.speed, -self.speed],          # Rotate Left (CCW)
-            'e': [-self.speed, self.speed, -self.speed, self.speed],          # Rotate Right (CW)
-            
-            # Diagonal movements
-            'z': [0, self.speed, self.speed, 0],                              # Diagonal Forward Left
-            'x': [self.speed, 0, 0, self.speed],                              # Diagonal Forward Right
-            'c': [0, -self.speed, -self.speed, 0],                            # Diagonal Backward Left
-            'v': [-self.speed, 0, 0, -self.speed],                            # Diagonal Backward Right
-            
-            # Curved movements
-            'r': [int(self.speed * 1.5), int(self.speed * 0.5),
-                  int(self.speed * 1.5), int(self.speed * 0.5)],              # Curved Forward Left
-            't': [int(self.speed * 0.5), int(self.speed * 1.5),
-                  int(self.speed * 0.5), int(self.speed * 1.5)],              # Curved Forward Right
-            'f': [-int(self.speed * 0.5), -int(self.speed * 1.5),
-                  -int(self.speed * 0.5), -int(self.speed * 1.5)],            # Curved Backward Left
-            'g': [-int(self.speed * 1.5), -int(self.speed * 0.5),
-                  -int(self.speed * 1.5), -int(self.speed * 0.5)]             # Curved Backward Right
-        }
-        # Add stop command
-        self.COMMANDS['stop'] = [0, 0, 0, 0]
+        # One multiply for every direction, written in place; astype truncates like int() did
+        self.table[:-1] = (self.SPEED_TABLE * self.speed / 10).astype(np.int16)
+        # Encoded once per speed change so move() does no formatting; the dict is reused
+        encoded, encoder = self.ENCODED, self.encoder
+        for key, row in zip(self.KEY_INDEX, self.table.tolist()):
+            encoded[key] = encoder(row)
+
+    def set_encoder(self, encoder):
+        """Switch the command encoding (CSV or binary frames) and re-encode all commands."""
+        self.encoder = encoder
+        self.update_commands()
 
     def get_speed(self):
         """Return the current speed setting."""
@@ -93,6 +122,29 @@ def decrease_speed(self, decrement=10):
         """Decrease speed by the specified decrement."""
         return self.set_speed(self.speed - decrement)
 
+# =================== Serial Helpers =================== #
+SPEED_FIELDS = {v: str(v).encode('ascii') for v in range(-255, 256)}  # Pre-encoded CSV field per PWM value
+_pack_speeds = struct.Struct('>hhhh').pack  # FL, FR, RL, RR as big-endian int16
+
+def encode_speeds(speeds):
+    """Encode [FL, FR, RL, RR] as the firmware's "fl,fr,rl,rr\n" command bytes."""
+    fields = SPEED_FIELDS
+    return b",".join([fields.get(s) or str(s).encode('ascii') for s in speeds]) + b"\n"
+
+def encode_motor_frame(speeds):
+    """Encode [FL, FR, RL, RR] as a 10-byte frame: sync, four big-endian int16, XOR checksum."""
+    body = _pack_speeds(*speeds)
+    # XOR all 8 body bytes at once by folding the packed 64-bit word onto its low byte
+    x = int.from_bytes(body, 'big')
+    x ^= x >> 32
+    x ^= x >> 16
+    x ^= x >> 8
+    return bytes((FRAME_SYNC,)) + body + bytes((x & 0xFF,))
+
+def encode_timed_move(speeds, duration):
+    """Encode "T,fl,fr,rl,rr,ms\n": the firmware runs speeds for duration seconds, then stops."""
+    return b"T," + encode_speeds(speeds)[:-1] + b",%d\n" % round(duration * 1000)
+
 # =================== Robot Controller Class =================== #
 class RobotController:
     """Manages communication with the robot and executes movement commands."""
@@ -103,10 +155,18 @@ def __init__(self, port=DEFAULT_SERIAL_PORT, baud_rate=DEFAULT_BAUD_RATE,
         self.baud_rate = baud_rate
         self.move_duration = move_duration
         self.serial_connection = None
+        self._write = None  # Bound serial_connection.write, cached on connect
+        self._fd = None  # Serial file descriptor for direct os.write (None on Windows)
+        self._tx_queue = queue.SimpleQueue()  # Encoded commands for the writer thread; None stops it
+        self._writer_thread = None  # Only thread that writes to serial_connection
         self.commands = Commands(speed)
         self.is_connected = False
-        self.hold_active = False
-        self.lock = threading.Lock()
+        self._hold_direction = None  # Command key the writer re-sends while holding
+        self._hold_event = threading.Event()  # Set while a hold is running
+        
+    @property
+    def hold_active(self):
+        return self._hold_event.is_set()
         
     def connect(self):
         """Establish a serial connection to the robot."""
@@ -120,13 +180,24 @@ def connect(self):
                     self.baud_rate,
                     timeout=SERIAL_TIMEOUT
                 )
+                enable_low_latency(self.serial_connection, self.port)
+                self._write = self.serial_connection.write
+                try:
+                    self._fd = self.serial_connection.fileno()
+                except (AttributeError, OSError):
+                    self._fd = None
                 # Allow Arduino to reset
                 time.sleep(2)
                 self.serial_connection.reset_input_buffer()
                 self.serial_connection.reset_output_buffer()
+                binary = self._negotiate_binary()
+                self.commands.set_encoder(encode_motor_frame if binary else encode_speeds)
                 
                 self.is_connected = True
-                print(f"Connected to robot on {self.port}")
+                if not (self._writer_thread and self._writer_thread.is_alive()):
+                    self._writer_thread = threading.Thread(target=self._writer, daemon=True)
+                    self._writer_thread.start()
+                print(f"Connected to robot on {self.port} ({'binary' if binary else 'CSV'} commands)")
                 return True
             except serial.SerialException as e:
                 print(f"Connection attempt {attempt+1}/{CONNECTION_RETRIES} failed: {str(e)}")
@@ -134,71 +205,124 @@ def connect(self):
         print(f"Failed to connect to robot on {self.port}")
         return False
         
+    def _negotiate_binary(self):
+        """Ask the firmware whether it takes binary speed frames; older firmware stays on CSV."""
+        self._write(BINARY_PROBE)
+        buf = bytearray()
+        deadline = time.monotonic() + NEGOTIATE_TIMEOUT
+        while time.monotonic() < deadline:
+            line = read_line(self.serial_connection, buf)
+            if line:
+                return line == BINARY_REPLY
+        return False
+        
     def disconnect(self):
         """Stop motors and close the serial connection."""
         if self.serial_connection:
             self.stop()
-            time.sleep(0.1)
+            self._tx_queue.put(None)  # Writer exits after sending the stop
+            if self._writer_thread:
+                self._writer_thread.join(1.0)
+            try:
+                self.serial_connection.flush()  # Drain the final stop once, before close
+            except serial.SerialException:
+                pass
             self.serial_connection.close()
             self.is_connected = False
             print("Disconnected from robot")
             
     def send_command(self, speeds):
-        """Send a motor speed command to the robot."""
+        """Send a motor speed command (speed list or pre-encoded bytes) to the robot."""
         if not self.is_connected:
             print("Error: Not connected to robot")
             return False
-        try:
-            with self.lock:
-                command = ",".join(map(str, speeds)) + "\n"
-                self.serial_connection.write(command.encode('utf-8'))
-                self.serial_connection.flush()
-                self._read_response()
-                return True
-        except Exception as e:
-            print(f"Error sending command: {str(e)}")
-            self.is_connected = False
-            return False
+        # Replies are printed by the read_serial thread
+        self._tx_queue.put(speeds if isinstance(speeds, bytes) else self.commands.encoder(speeds))
+        return True
             
-    def _read_response(self):
-        """Read and display any response from the robot (non-blocking)."""
+    def _writer(self):
+        """Write queued commands to the robot until None is queued.
+
+        While a hold is active, the held command is re-sent whenever the queue
+        has been idle for 1/HOLD_RESEND_RATE seconds.
+        """
+        interval = 1.0 / HOLD_RESEND_RATE
+        while True:
+            try:
+                payload = self._tx_queue.get(timeout=interval if self._hold_event.is_set() else None)
+            except queue.Empty:
+                if not self._hold_event.is_set():
+                    continue
+                # Prebuilt bytes, looked up each time so speed changes apply mid-hold.
+                # A stop queued meanwhile is still written after this, by this thread.
+                payload = self.commands.ENCODED[self._hold_direction]
+            if payload is None:
+                return
+            try:
+                # No flush(): write() already hands the bytes to the OS, and
+                # flush() would block in tcdrain until they leave the UART
+                self._send(payload)
+            except Exception as e:
+                print(f"Error sending command: {str(e)}")
+                self.is_connected = False
+            
+    def _send(self, payload):
+        """Write payload straight to the fd; pyserial only handles a full OS buffer."""
+        if self._fd is None:
+            self._write(payload)
+            return
         try:
-            response = self.serial_connection.readline().decode('utf-8').strip()
-            if response:
-                print(f"Robot: {response}")
-        except Exception:
-            pass
+            # Commands are far below PIPE_BUF, so one syscall normally takes all of it
+            written = os.write(self._fd, payload)
+        except BlockingIOError:
+            written = 0  # pyserial opens the port non-blocking
+        if written < len(payload):
+            self._write(payload[written:])
             
     def move(self, direction):
         """Execute a movement in the specified direction."""
-        if direction not in self.commands.COMMANDS:
+        if direction not in Commands.MOVE_KEYS:
             print(f"Unknown direction: {direction}")
             return False
-        motor_speeds = self.commands.COMMANDS[direction]
-        return self.send_command(motor_speeds)
+        return self.send_command(self.commands.ENCODED[direction])
         
     def move_for_duration(self, direction):
-        """Move in the specified direction for the set duration then stop."""
-        if not self.move(direction):
+        """Move in the specified direction for the set duration; the Arduino times the stop."""
+        if direction not in Commands.MOVE_KEYS:
+            print(f"Unknown direction: {direction}")
+            return False
+        self._end_hold()
+        speeds = self.commands.COMMANDS[direction]
+        if not self.send_command(encode_timed_move(speeds, self.move_duration)):
             return False
         time.sleep(self.move_duration)
-        return self.stop()
+        return True
         
     def start_hold(self, direction):
         """Start continuous movement in the specified direction until stopped."""
         if self.hold_active:
             self.stop()
-        if direction not in self.commands.COMMANDS:
+        if direction not in Commands.MOVE_KEYS:
             print(f"Unknown direction for hold: {direction}")
             return False
         print(f"Holding {direction} direction. Enter 'stop' to halt.")
-        self.hold_active = True
-        return self.move(direction)
+        # Set before queueing, so the writer's wait after this command already
+        # uses the hold interval instead of blocking for the next command
+        self._hold_direction = direction
+        self._hold_event.set()
+        if not self.move(direction):
+            self._end_hold()
+            return False
+        return True
         
+    def _end_hold(self):
+        """Stop hold re-sends; the writer only re-sends when the queue is empty."""
+        self._hold_event.clear()
+            
     def stop(self):
         """Stop all motors."""
-        self.hold_active = False
-        return self.send_command(self.commands.COMMANDS['stop'])
+        self._end_hold()
+        return self.send_command(self.commands.ENCODED['stop'])
         
     def set_speed(self, speed):
         """Update the movement speed and refresh commands."""
@@ -226,27 +350,65 @@ def set_move_duration(self, duration):
     def calibration_test(self):
         """Run a calibration test by sequentially driving each motor individually."""
         print("Starting calibration test...")
+        self._end_hold()
         for i in range(4):
             speeds = [0, 0, 0, 0]
             speeds[i] = self.commands.get_speed()
-            self.send_command(speeds)
-            time.sleep(self.move_duration)
-            self.send_command(self.commands.COMMANDS['stop'])
-            time.sleep(0.5)
+            self.send_command(encode_timed_move(speeds, self.move_duration))
+            time.sleep(self.move_duration + 0.5)
         print("Calibration test complete.")
 
 # =================== Serial Reader Thread =================== #
+READER_POLL_TIMEOUT = 0.2  # Max seconds between stop_event checks while the port is idle
+
 def read_serial(ser, stop_event):
     """Continuously read and print any messages from the robot."""
-    while not stop_event.is_set():
-        if ser.in_waiting:
+    try:
+        fd = ser.fileno()
+    except (AttributeError, OSError):
+        fd = None  # No selectable fd (Windows)
+    if fd is None:
+        _read_serial_polling(ser, stop_event)
+        return
+    # Sleep in the kernel until bytes arrive, then take everything in one os.read
+    sel = selectors.DefaultSelector()
+    sel.register(fd, selectors.EVENT_READ)
+    buf = bytearray()
+    try:
+        while not stop_event.is_set():
+            if not sel.select(timeout=READER_POLL_TIMEOUT):
+                continue
             try:
-                line = ser.readline().decode('utf-8', errors='replace').strip()
+                data = os.read(fd, 4096)
+            except OSError:
+                stop_event.wait(0.1)
+                continue
+            if not data:
+                # Readable but empty: the device is gone, and select would now spin
+                print("Robot disconnected: serial port closed.")
+                break
+            buf += data
+            while b"\n" in buf:
+                line, _, rest = buf.partition(b"\n")
+                buf[:] = rest
+                line = line.decode('utf-8', errors='replace').strip()
                 if line:
                     print("Robot:", line)
-            except Exception:
-                pass
-        time.sleep(0.1)
+    finally:
+        sel.close()
+
+def _read_serial_polling(ser, stop_event):
+    """read_serial fallback for ports without a selectable fd."""
+    buf = bytearray()
+    while not stop_event.is_set():
+        try:
+            # Blocks for at most SERIAL_TIMEOUT, so stop_event is still checked often
+            line = read_line(ser, buf)
+        except Exception:
+            stop_event.wait(0.1)
+            continue
+        if line:
+            print("Robot:", line)
 
 # =================== User Interface =================== #
 def print_help():
@@ -293,6 +455,38 @@ def interactive_mode(controller):
     print(f"\nCurrent settings: Speed={controller.commands.get_speed()}, Duration={controller.move_duration:.1f}s")
     print("Enter command (or 'help' for options):")
     
+    def stop_motors():
+        controller.stop()
+        print("Motors stopped.")
+        
+    def set_speed(value):
+        try:
+            controller.set_speed(int(value))
+        except ValueError:
+            print("Invalid speed value.")
+            
+    def set_duration(value):
+        try:
+            controller.set_move_duration(float(value))
+        except ValueError:
+            print("Invalid duration value.")
+    
+    # Exact-match commands, then commands that take one argument (handler, usage)
+    actions = {
+        "help": print_help,
+        "stop": stop_motors,
+        "+": controller.increase_speed,
+        "up": controller.increase_speed,
+        "-": controller.decrease_speed,
+        "down": controller.decrease_speed,
+        "calib": controller.calibration_test,
+    }
+    arg_actions = {
+        "hold": (controller.start_hold, "<direction>"),
+        "speed": (set_speed, "<value>"),
+        "duration": (set_duration, "<seconds>"),
+    }
+    
     while True:
         try:
             user_input = input("> ").strip().lower()
@@ -300,44 +494,19 @@ def interactive_mode(controller):
                 continue
             if user_input in ("exit", "quit"):
                 break
-            elif user_input == "help":
-                print_help()
-            elif user_input.startswith("hold"):
-                parts = user_input.split()
-                if len(parts) < 2:
-                    print("Usage: hold <direction>")
-                else:
-                    controller.start_hold(parts[1])
-            elif user_input == "stop":
-                controller.stop()
-                print("Motors stopped.")
-            elif user_input.startswith("speed"):
-                parts = user_input.split()
-                if len(parts) < 2:
-                    print("Usage: speed <value>")
-                else:
-                    try:
-                        value = int(parts[1])
-                        controller.set_speed(value)
-                    except ValueError:
-                        print("Invalid speed value.")
-            elif user_input in ("+", "up"):
-                controller.increase_speed()
-            elif user_input in ("-", "down"):
-                controller.decrease_speed()
-            elif user_input.startswith("duration"):
-                parts = user_input.split()
-                if len(parts) < 2:
-                    print("Usage: duration <seconds>")
+            action = actions.get(user_input)
+            if action:
+                action()
+                continue
+            verb, _, rest = user_input.partition(" ")
+            if verb in arg_actions:
+                handler, usage = arg_actions[verb]
+                args = rest.split()
+                if args:
+                    handler(args[0])
                 else:
-                    try:
-                        dur = float(parts[1])
-                        controller.set_move_duration(dur)
-                    except ValueError:
-                        print("Invalid duration value.")
-            elif user_input == "calib":
-                controller.calibration_test()
-            elif user_input in controller.commands.COMMANDS:
+                    print(f"Usage: {verb} {usage}")
+            elif user_input in Commands.MOVE_KEYS:
                 # Execute momentary movement: move for the set duration then stop.
                 controller.move_for_duration(user_input)
             else:
@@ -350,11 +519,12 @@ def interactive_mode(controller):
 def main():
     parser = argparse.ArgumentParser(description="Mecanum Robot Controller")
     parser.add_argument("-p", "--port", default=DEFAULT_SERIAL_PORT, help="Serial port to use (default: /dev/ttyACM0)")
+    parser.add_argument("-b", "--baud", type=int, default=DEFAULT_BAUD_RATE, help=f"Baud rate (default: {DEFAULT_BAUD_RATE})")
     parser.add_argument("-s", "--speed", type=int, default=DEFAULT_MOTOR_SPEED, help="Default motor speed (0-255)")
     parser.add_argument("-d", "--duration", type=float, default=DEFAULT_MOVE_DURATION, help="Movement duration in seconds")
     args = parser.parse_args()
 
-    controller = RobotController(port=args.port, baud_rate=DEFAULT_BAUD_RATE, move_duration=args.duration, speed=args.speed)
+    controller = RobotController(port=args.port, baud_rate=args.baud, move_duration=args.duration, speed=args.speed)
     
     if not controller.connect():
         sys.exit(1)
@@ -1,10 +1,35 @@
 #!/usr/bin/env python3
+import os
 import serial
+import sys
 import time
 
-def open_serial(port='/dev/ttyACM0', baud_rate=9600):
+# Shared serial helpers live in utils/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'utils'))
+from serial_utils import enable_low_latency
+
+READ_TIMEOUT = 0.5  # Seconds read_serial keeps draining a board that keeps talking
+REPLY_WAIT = 0.02   # Seconds to let the board answer a command; a reply line takes ~2 ms at 115200
+
+# Menu choice -> encoded command for the canned moves, built once at import
+COMMANDS = {
+    "1": b"100,100,100,100\n",      # Forward
+    "2": b"-100,-100,-100,-100\n",  # Backward
+    "3": b"-100,100,100,-100\n",    # Strafe left
+    "4": b"100,-100,-100,100\n",    # Strafe right
+    "5": b"100,-100,100,-100\n",    # Rotate clockwise
+    "6": b"-100,100,-100,100\n",    # Rotate counterclockwise
+    "7": b"100,0,0,100\n",          # Diagonal forward left
+    "8": b"0,100,100,0\n",          # Diagonal forward right
+    "9": b"-100,0,0,-100\n",        # Diagonal backward left
+    "10": b"0,-100,-100,0\n",       # Diagonal backward right
+    "11": b"0,0,0,0\n",             # Stop
+}
+
+def open_serial(port='/dev/ttyACM0', baud_rate=115200):
     try:
         ser = serial.Serial(port, baud_rate, timeout=1)
+        enable_low_latency(ser, port)
         time.sleep(2)  # Allow time for the Arduino to reset
         print(f"Connected to {port} at {baud_rate} baud.")
         return ser
@@ -12,16 +37,21 @@ def open_serial(port='/dev/ttyACM0', baud_rate=9600):
         print(f"Error opening serial port {port}: {e}")
         exit(1)
 
-def send_command(ser, command_str):
-    """Send a command (e.g., "100,-100,100,-100") to the board."""
-    command = command_str.strip() + "\n"
-    ser.write(command.encode())
-    print(f"Sent: {command_str}")
+def send_command(ser, command):
+    """Send command bytes (e.g., b"100,-100,100,-100\\n") to the board."""
+    ser.write(command)
+    print(f"Sent: {command.decode().strip()}")
 
-def read_serial(ser):
-    """Read and print any messages available from the board."""
-    while ser.in_waiting:
-        line = ser.readline().decode('utf-8', errors='replace').strip()
+def read_serial(ser, timeout=READ_TIMEOUT):
+    """Read and print any messages available from the board, for at most timeout seconds."""
+    buf = bytearray()
+    deadline = time.monotonic() + timeout
+    while ser.in_waiting and time.monotonic() < deadline:
+        buf += ser.read(ser.in_waiting)  # Everything waiting, in one call
+        if not buf.endswith(b"\n"):
+            buf += ser.read_until(b"\n")  # Finish a line the board is still sending
+    for raw in buf.split(b"\n"):
+        line = raw.decode('utf-8', errors='replace').strip()
         if line:
             print("Board:", line)
 
@@ -47,35 +77,15 @@ def main():
     while True:
         print_menu()
         choice = input("Enter your choice (1-14): ").strip()
-        if choice == "1":
-            command = "100,100,100,100"
-        elif choice == "2":
-            command = "-100,-100,-100,-100"
-        elif choice == "3":
-            command = "-100,100,100,-100"
-        elif choice == "4":
-            command = "100,-100,-100,100"
-        elif choice == "5":
-            command = "100,-100,100,-100"
-        elif choice == "6":
-            command = "-100,100,-100,100"
-        elif choice == "7":
-            command = "100,0,0,100"
-        elif choice == "8":
-            command = "0,100,100,0"
-        elif choice == "9":
-            command = "-100,0,0,-100"
-        elif choice == "10":
-            command = "0,-100,-100,0"
-        elif choice == "11":
-            command = "0,0,0,0"
+        if choice in COMMANDS:
+            command = COMMANDS[choice]
         elif choice == "12":
             custom = input("Enter custom speeds as comma-separated values (e.g., 50,-50,50,-50): ")
             parts = custom.split(',')
             if len(parts) != 4:
                 print("Invalid format. Please enter exactly 4 comma-separated numbers.")
                 continue
-            command = custom.strip()
+            command = f"{custom.strip()}\n".encode()
         elif choice == "13":
             print("Reading messages from board:")
             read_serial(ser)
@@ -89,7 +99,7 @@ def main():
 
         send_command(ser, command)
         # Give the board a moment to respond and then read any output.
-        time.sleep(0.1)
+        time.sleep(REPLY_WAIT)
         read_serial(ser)
         
     ser.close()
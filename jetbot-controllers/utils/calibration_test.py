@@ -8,9 +8,11 @@
 import time
 import sys
 
+from serial_utils import enable_low_latency
+
 # Serial port configuration
 DEFAULT_PORT = "/dev/ttyACM0"  # Adjust as needed
-BAUD_RATE = 9600
+BAUD_RATE = 115200
 TEST_DURATION = 2  # Movement duration in seconds
 DEFAULT_SPEED = 150
 
@@ -62,6 +64,7 @@ def main():
     
     try:
         ser = serial.Serial(port, BAUD_RATE, timeout=1)
+        enable_low_latency(ser, port)
         time.sleep(2)  # Allow Arduino to reset
         print(f"Connected to Arduino on {port}.")
     except serial.SerialException as e:
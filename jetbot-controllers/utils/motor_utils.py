@@ -13,7 +13,13 @@
     print("PySerial not installed. Run: pip install pyserial")
     sys.exit(1)
 
-def test_motors(port, baud_rate=9600, test_duration=1.0):
+from serial_utils import enable_low_latency, read_line
+
+MOTOR_NAMES = ("front left", "front right", "rear left", "rear right")
+SELFTEST_PAUSE = 0.5   # Seconds the firmware pauses between motors
+SELFTEST_MARGIN = 2.0  # Extra seconds to wait for DONE before giving up
+
+def test_motors(port, baud_rate=115200, test_duration=1.0):
     """
     Test all motors in sequence to verify functionality
     
@@ -27,38 +33,27 @@ def test_motors(port, baud_rate=9600, test_duration=1.0):
     """
     try:
         ser = serial.Serial(port, baud_rate, timeout=1)
+        enable_low_latency(ser, port)
         print(f"Connected to {port} at {baud_rate} baud")
         time.sleep(2)  # Wait for Arduino to reset
         
         print("\nTesting motors in sequence:")
         
-        # Test front left motor
-        print("Testing front left motor...")
-        ser.write(b"100,0,0,0\n")
-        time.sleep(test_duration)
-        ser.write(b"0,0,0,0\n")
-        time.sleep(0.5)
-        
-        # Test front right motor
-        print("Testing front right motor...")
-        ser.write(b"0,100,0,0\n")
-        time.sleep(test_duration)
-        ser.write(b"0,0,0,0\n")
-        time.sleep(0.5)
-        
-        # Test rear left motor
-        print("Testing rear left motor...")
-        ser.write(b"0,0,100,0\n")
-        time.sleep(test_duration)
-        ser.write(b"0,0,0,0\n")
-        time.sleep(0.5)
-        
-        # Test rear right motor
-        print("Testing rear right motor...")
-        ser.write(b"0,0,0,100\n")
-        time.sleep(test_duration)
-        ser.write(b"0,0,0,0\n")
-        time.sleep(0.5)
+        # The firmware runs the whole sequence on its own clock and prints DONE
+        ser.write(b"SELFTEST,%d\n" % round(test_duration * 1000))
+        deadline = time.monotonic() + 4 * (test_duration + SELFTEST_PAUSE) + SELFTEST_MARGIN
+        buf = bytearray()
+        while True:
+            if time.monotonic() > deadline:
+                ser.write(b"0,0,0,0\n")
+                ser.close()
+                print("\nError: no DONE from firmware (does it support SELFTEST?)")
+                return False
+            line = read_line(ser, buf)
+            if line == "DONE":
+                break
+            if line and line.startswith("SELFTEST motor "):
+                print(f"Testing {MOTOR_NAMES[int(line[15:])]} motor...")
         
         # Close the connection
         ser.close()
@@ -69,7 +64,7 @@ def test_motors(port, baud_rate=9600, test_duration=1.0):
         print(f"Error: {e}")
         return False
 
-def calibrate_motor_speeds(port, baud_rate=9600):
+def calibrate_motor_speeds(port, baud_rate=115200):
     """
     Interactive calibration of motor speeds to ensure straight driving
     
@@ -82,6 +77,7 @@ def calibrate_motor_speeds(port, baud_rate=9600):
     """
     try:
         ser = serial.Serial(port, baud_rate, timeout=1)
+        enable_low_latency(ser, port)
         print(f"Connected to {port} at {baud_rate} baud")
         time.sleep(2)  # Wait for Arduino to reset
         
@@ -15,7 +15,12 @@
     print("Missing dependencies. Run: pip install pyserial numpy")
     sys.exit(1)
 
-def calibrate_ir_sensors(port, baud_rate=9600, samples=50):
+from serial_utils import enable_low_latency, read_line
+
+SENSOR_CHANNELS = ("left", "center", "right")  # Column order of IR readings
+PROGRESS_EVERY = 10  # Redraw the sample progress line every N readings
+
+def calibrate_ir_sensors(port, baud_rate=115200, samples=50):
     """
     Calibrates infrared line sensors by measuring surfaces and calculating thresholds
     
@@ -29,6 +34,7 @@ def calibrate_ir_sensors(port, baud_rate=9600, samples=50):
     """
     try:
         ser = serial.Serial(port, baud_rate, timeout=1)
+        enable_low_latency(ser, port)
         print(f"Connected to {port} at {baud_rate} baud")
         time.sleep(2)  # Wait for Arduino to reset
         
@@ -40,34 +46,29 @@ def calibrate_ir_sensors(port, baud_rate=9600, samples=50):
         # Collect data for the line (dark surface)
         input("\nPlace sensors over the LINE (dark surface) and press Enter...")
         dark_values = _collect_sensor_readings(ser, samples)
+        if dark_values is None:
+            ser.close()
+            return None
         
         # Collect data for the background (light surface)
         input("\nPlace sensors over the BACKGROUND (light surface) and press Enter...")
         light_values = _collect_sensor_readings(ser, samples)
+        if light_values is None:
+            ser.close()
+            return None
         
-        # Calculate thresholds
+        # Calculate thresholds for all channels at once
+        dark_mean = dark_values["mean"]
+        light_mean = light_values["mean"]
+        threshold = (dark_mean + light_mean) * 0.5
         calibration = {
-            "left": {
-                "dark_avg": dark_values["left"]["mean"],
-                "light_avg": light_values["left"]["mean"],
-                "threshold": (dark_values["left"]["mean"] + light_values["left"]["mean"]) / 2
-            },
-            "center": {
-                "dark_avg": dark_values["center"]["mean"],
-                "light_avg": light_values["center"]["mean"],
-                "threshold": (dark_values["center"]["mean"] + light_values["center"]["mean"]) / 2
-            },
-            "right": {
-                "dark_avg": dark_values["right"]["mean"],
-                "light_avg": light_values["right"]["mean"],
-                "threshold": (dark_values["right"]["mean"] + light_values["right"]["mean"]) / 2
-            }
+            channel: {"dark_avg": dark, "light_avg": light, "threshold": thresh}
+            for channel, dark, light, thresh in zip(
+                SENSOR_CHANNELS, dark_mean.tolist(), light_mean.tolist(), threshold.tolist())
         }
         
         # Determine if line is darker or lighter than background
-        avg_dark = (dark_values["left"]["mean"] + dark_values["center"]["mean"] + dark_values["right"]["mean"]) / 3
-        avg_light = (light_values["left"]["mean"] + light_values["center"]["mean"] + light_values["right"]["mean"]) / 3
-        calibration["line_is_darker"] = avg_dark < avg_light
+        calibration["line_is_darker"] = bool(dark_mean.mean() < light_mean.mean())
         
         ser.close()
         print("\nCalibration completed.")
@@ -89,60 +90,57 @@ def _collect_sensor_readings(ser, samples):
     
     Args:
         ser (serial.Serial): Open serial connection
-        samples (int): Number of samples to collect
+        samples (int): Number of samples to stream
         
     Returns:
-        dict: Sensor data with statistics
+        dict: "mean", "std", "min" and "max" arrays, one value per SENSOR_CHANNELS entry,
+        or None if no readings arrived
     """
     print(f"Collecting {samples} samples...")
     
-    left_values = []
-    center_values = []
-    right_values = []
+    readings = np.empty((samples, 3), dtype=np.int32)  # Columns: left, center, right
+    count = 0
+    # Progress is only drawn on a terminal, and only every PROGRESS_EVERY samples
+    show_progress = sys.stdout.isatty()
+    write = sys.stdout.write
     
-    # Request sensor readings from Arduino (assuming it responds with "L,C,R" format)
-    for i in range(samples):
-        ser.write(b"GET_SENSORS\n")
-        response = ser.readline().decode('utf-8').strip()
+    # Ask the Arduino to stream all samples back-to-back, one "L,C,R" line each,
+    # instead of one GET_SENSORS round trip per sample
+    ser.write(f"STREAM_SENSORS,{samples}\n".encode())
+    buf = bytearray()
+    while count < samples:
+        response = read_line(ser, buf)
+        if response is None:
+            break  # Stream stopped early (port timed out)
         try:
-            l, c, r = map(int, response.split(','))
-            left_values.append(l)
-            center_values.append(c)
-            right_values.append(r)
-            sys.stdout.write(f"\rProgress: {i+1}/{samples}")
-            sys.stdout.flush()
-            time.sleep(0.1)
-        except (ValueError, AttributeError):
+            readings[count] = [int(v) for v in response.split(',')]
+        except ValueError:
             # Skip invalid readings
-            pass
+            continue
+        count += 1
+        if show_progress and count % PROGRESS_EVERY == 0:
+            write(f"\rProgress: {count}/{samples}")
+            sys.stdout.flush()
     
-    print()  # New line after progress
+    if show_progress:
+        write(f"\rProgress: {count}/{samples}\n")
+    if count == 0:
+        print("Error: no sensor readings received "
+              "(is mecanum-line-follower-advanced.ino loaded?)")
+        return None
+    readings = readings[:count]
     
-    # Calculate statistics
+    # Calculate statistics for all channels in one pass each
     results = {
-        "left": {
-            "mean": np.mean(left_values),
-            "std": np.std(left_values),
-            "min": np.min(left_values),
-            "max": np.max(left_values)
-        },
-        "center": {
-            "mean": np.mean(center_values),
-            "std": np.std(center_values),
-            "min": np.min(center_values),
-            "max": np.max(center_values)
-        },
-        "right": {
-            "mean": np.mean(right_values),
-            "std": np.std(right_values),
-            "min": np.min(right_values),
-            "max": np.max(right_values)
-        }
+        "mean": readings.mean(axis=0),
+        "std": readings.std(axis=0),
+        "min": readings.min(axis=0),
+        "max": readings.max(axis=0)
     }
     
     return results
 
-def calibrate_mpu6050(port, baud_rate=9600, duration=10):
+def calibrate_mpu6050(port, baud_rate=115200, duration=10):
     """
     Calibrates the MPU6050 IMU sensor by collecting data at rest
     
@@ -156,6 +154,7 @@ def calibrate_mpu6050(port, baud_rate=9600, duration=10):
     """
     try:
         ser = serial.Serial(port, baud_rate, timeout=1)
+        enable_low_latency(ser, port)
         print(f"Connected to {port} at {baud_rate} baud")
         time.sleep(2)  # Wait for Arduino to reset
         
@@ -169,11 +168,15 @@ def calibrate_mpu6050(port, baud_rate=9600, duration=10):
         # Request IMU calibration from Arduino
         ser.write(f"CALIBRATE_IMU,{duration}\n".encode())
         
-        # Show progress
-        for i in range(duration):
-            sys.stdout.write(f"\rCalibrating: {i+1}/{duration}s")
-            sys.stdout.flush()
-            time.sleep(1)
+        # Show progress (a countdown only makes sense on a terminal)
+        if sys.stdout.isatty():
+            write = sys.stdout.write
+            for i in range(duration):
+                write(f"\rCalibrating: {i+1}/{duration}s")
+                sys.stdout.flush()
+                time.sleep(1)
+        else:
+            time.sleep(duration)
             
         print("\nProcessing calibration data...")
         
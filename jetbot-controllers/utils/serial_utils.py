@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Serial port helper functions for Mecanum robot
+This module provides shared setup for the serial connections of the utility
+scripts, src/ and basic-control/simple_square_app.py
+"""
+
+import os
+
+def enable_low_latency(ser, port):
+    """
+    Put a USB-serial port in low-latency mode
+
+    Linux USB-serial drivers batch outgoing bytes for up to one latency_timer
+    tick (16 ms by default); low-latency mode cuts that to ~1 ms.
+
+    Args:
+        ser (serial.Serial): Open serial connection
+        port (str): Device path the connection was opened on
+
+    Returns:
+        bool: True if low-latency mode was enabled, False otherwise
+    """
+    try:
+        ser.set_low_latency_mode(True)
+        return True
+    except AttributeError:
+        # pyserial < 3.5: set ASYNC_LOW_LATENCY with the same ioctl it would use
+        try:
+            import array
+            import fcntl
+            import termios
+            buf = array.array('i', [0] * 32)
+            fcntl.ioctl(ser.fileno(), termios.TIOCGSERIAL, buf)
+            buf[4] |= 0x2000  # ASYNC_LOW_LATENCY in serial_struct.flags
+            fcntl.ioctl(ser.fileno(), termios.TIOCSSERIAL, buf)
+            return True
+        except (ImportError, AttributeError, OSError):
+            pass  # Not Linux, or the driver refused; try sysfs instead
+    except (OSError, ValueError, NotImplementedError):
+        pass  # Unsupported driver; try sysfs instead
+    # FTDI-style adapters expose the timer directly
+    name = os.path.basename(os.path.realpath(port))
+    try:
+        with open(f"/sys/bus/usb-serial/devices/{name}/latency_timer", "wb") as f:
+            f.write(b"1")
+        return True
+    except OSError:
+        return False
+
+def read_line(ser, buf):
+    """
+    Read the next line from a serial connection in bulk
+
+    pyserial's readline() issues one read per byte; this reads everything
+    already waiting in a single call.
+
+    Args:
+        ser (serial.Serial): Open serial connection
+        buf (bytearray): Carries bytes past the newline over to the next call
+
+    Returns:
+        str: The line without its line ending, or None if the port timed out
+    """
+    while b"\n" not in buf:
+        chunk = ser.read(ser.in_waiting or 1)
+        if not chunk:
+            return None
+        buf += chunk
+    line, _, rest = buf.partition(b"\n")
+    buf[:] = rest
+    return line.decode('utf-8', errors='replace').strip()
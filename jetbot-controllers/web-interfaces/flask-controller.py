@@ -12,13 +12,90 @@
 """
 
 import serial
+import threading
 import time
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request
 
 # Serial port configuration
 SERIAL_PORT = "/dev/ttyACM0"  # Adjust as needed (e.g., "/dev/ttyUSB0" or "COM3" on Windows)
 BAUD_RATE = 115200  # Matches Arduino's baud rate
 
+# Web server configuration
+HOST = '0.0.0.0'
+PORT = 6500
+SERVER_THREADS = 4  # Requests served in parallel, so a slow client can't hold up /control
+KEEPALIVE = 10      # Seconds an idle browser connection stays open for the next button press
+
+# Control page, encoded once at import; nothing in it changes per request
+INDEX_HTML = '''
+<html>
+<head>
+    <title>Mecanum Robot Control</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            text-align: center;
+            margin: 20px;
+        }
+        .control-grid {
+            display: grid;
+            grid-template-columns: repeat(3, 1fr);
+            gap: 10px;
+            margin: 20px auto;
+            max-width: 300px;
+        }
+        button {
+            padding: 15px;
+            font-size: 18px;
+            cursor: pointer;
+            background-color: #4CAF50;
+            color: white;
+            border: none;
+            border-radius: 5px;
+        }
+        button:active {
+            background-color: #3e8e41;
+        }
+        .stop-button {
+            grid-column: span 3;
+            background-color: #f44336;
+        }
+        .stop-button:active {
+            background-color: #d32f2f;
+        }
+    </style>
+    <script>
+        function sendCommand(command) {
+            fetch('/control', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/x-www-form-urlencoded'},
+                body: 'command=' + command
+            });
+        }
+    </script>
+</head>
+<body>
+    <h1>Mecanum Robot Control</h1>
+
+    <div class="control-grid">
+        <!-- Directional controls -->
+        <button onmousedown="sendCommand('forward')" onmouseup="sendCommand('stop')">↑</button>
+        <button onmousedown="sendCommand('backward')" onmouseup="sendCommand('stop')">↓</button>
+        <button onmousedown="sendCommand('right')" onmouseup="sendCommand('stop')">→</button>
+        <button onmousedown="sendCommand('left')" onmouseup="sendCommand('stop')">←</button>
+
+        <!-- Rotation controls -->
+        <button onmousedown="sendCommand('rotate_left')" onmouseup="sendCommand('stop')">↺</button>
+        <button onmousedown="sendCommand('rotate_right')" onmouseup="sendCommand('stop')">↻</button>
+
+        <!-- Stop button -->
+        <button class="stop-button" onclick="sendCommand('stop')">STOP</button>
+    </div>
+</body>
+</html>
+'''.encode('utf-8')
+
 app = Flask(__name__)
 
 # Initialize serial connection
@@ -30,98 +107,58 @@
     print(f"Error opening serial port: {e}")
     ser = None
 
-def send_command(command):
+# Serial writer state: request threads only leave the newest command in _pending
+_cv = threading.Condition()
+_pending = None    # Latest command not yet written; a newer one replaces it
+_last_sent = None  # Last command written to the port
+_writer = None
+
+def _serial_writer():
     """
-    Send a command to the Arduino via serial
-    
-    Args:
-        command: String command to send to the Arduino
+    Write pending commands to the Arduino, skipping repeats of the last one
     """
-    if ser and ser.is_open:
+    global _pending, _last_sent
+    while True:
+        with _cv:
+            _cv.wait_for(lambda: _pending is not None)
+            command, _pending = _pending, None
+        # Browsers often fire the same command twice (mouse and touch events);
+        # stop is always written so the robot can't be left moving
+        if command == _last_sent and command != 'stop':
+            continue
         try:
             ser.write((command + "\n").encode())
+            _last_sent = command
             print(f"Sent: {command}")
-            return True
         except Exception as e:
             print(f"Error sending command: {e}")
-            return False
-    else:
+
+def send_command(command):
+    """
+    Queue a command for the serial writer thread without waiting on USB
+    
+    Args:
+        command: String command to send to the Arduino
+    """
+    global _pending, _writer
+    if not (ser and ser.is_open):
         print("Serial port not connected")
         return False
+    with _cv:
+        # Started on first use so it runs in the serving process (gunicorn forks)
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_serial_writer, daemon=True)
+            _writer.start()
+        _pending = command
+        _cv.notify()
+    return True
 
 @app.route('/')
 def index():
     """
-    Render the main control interface
+    Serve the main control interface
     """
-    return '''
-    <html>
-    <head>
-        <title>Mecanum Robot Control</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                text-align: center;
-                margin: 20px;
-            }
-            .control-grid {
-                display: grid;
-                grid-template-columns: repeat(3, 1fr);
-                gap: 10px;
-                margin: 20px auto;
-                max-width: 300px;
-            }
-            button {
-                padding: 15px;
-                font-size: 18px;
-                cursor: pointer;
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                border-radius: 5px;
-            }
-            button:active {
-                background-color: #3e8e41;
-            }
-            .stop-button {
-                grid-column: span 3;
-                background-color: #f44336;
-            }
-            .stop-button:active {
-                background-color: #d32f2f;
-            }
-        </style>
-        <script>
-            function sendCommand(command) {
-                fetch('/control', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/x-www-form-urlencoded'},
-                    body: 'command=' + command
-                });
-            }
-        </script>
-    </head>
-    <body>
-        <h1>Mecanum Robot Control</h1>
-        
-        <div class="control-grid">
-            <!-- Directional controls -->
-            <button onmousedown="sendCommand('forward')" onmouseup="sendCommand('stop')">↑</button>
-            <button onmousedown="sendCommand('backward')" onmouseup="sendCommand('stop')">↓</button>
-            <button onmousedown="sendCommand('right')" onmouseup="sendCommand('stop')">→</button>
-            <button onmousedown="sendCommand('left')" onmouseup="sendCommand('stop')">←</button>
-            
-            <!-- Rotation controls -->
-            <button onmousedown="sendCommand('rotate_left')" onmouseup="sendCommand('stop')">↺</button>
-            <button onmousedown="sendCommand('rotate_right')" onmouseup="sendCommand('stop')">↻</button>
-            
-            <!-- Stop button -->
-            <button class="stop-button" onclick="sendCommand('stop')">STOP</button>
-        </div>
-    </body>
-    </html>
-    '''
+    return Response(INDEX_HTML, mimetype='text/html')
 
 @app.route('/control', methods=['POST'])
 def control():
@@ -144,8 +181,33 @@ def control():
     'stop': 'stop'
 }
 
+def run_server():
+    """
+    Serve the app with gunicorn, falling back to Flask's development server
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("gunicorn not installed (pip install gunicorn); using Flask's development server")
+        app.run(host=HOST, port=PORT, threaded=True)
+        return
+
+    class ControllerServer(BaseApplication):
+        def load_config(self):
+            # One worker: the serial port belongs to this process
+            self.cfg.set('bind', f'{HOST}:{PORT}')
+            self.cfg.set('workers', 1)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', SERVER_THREADS)
+            self.cfg.set('keepalive', KEEPALIVE)
+
+        def load(self):
+            return app
+
+    ControllerServer().run()
+
 if __name__ == "__main__":
     print("Starting Flask web server...")
-    print("Access the control panel at http://localhost:5000")
+    print(f"Access the control panel at http://localhost:{PORT}")
     print("Press Ctrl+C to stop the server")
-    app.run(host='0.0.0.0', port=6500) 
+    run_server() 
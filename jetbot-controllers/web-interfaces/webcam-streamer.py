@@ -13,156 +13,209 @@
 Original content follows:
 """
 
-import subprocess
-import http.server
-import socketserver
-import threading
+import asyncio
+import os
 import signal
 import sys
 import socket
 import logging
-import time
 import argparse
-from queue import Queue
+from quart import Quart, Response
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+JPEG_SOI = b'\xff\xd8'  # Start-of-image marker
+JPEG_EOI = b'\xff\xd9'  # End-of-image marker
+FRAME_WAIT_TIMEOUT = 5  # Seconds a client waits for a new frame before logging a warning
+PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+INDEX_HTML = b'''
+<html>
+<head>
+    <title>Live Webcam Feed</title>
+</head>
+<body>
+    <h1>Live Webcam Feed</h1>
+    <img src="/feed.mjpg" alt="Live Video Stream">
+</body>
+</html>
+'''
+
+def extract_jpegs(buf):
+    """Remove every complete JPEG from the front of buf (a bytearray) and return them."""
+    frames = []
+    while True:
+        start = buf.find(JPEG_SOI)
+        if start < 0:
+            # Keep a trailing 0xFF in case it begins a marker split across reads
+            del buf[:-1 if buf.endswith(b'\xff') else len(buf)]
+            return frames
+        end = buf.find(JPEG_EOI, start + 2)
+        if end < 0:
+            del buf[:start]
+            return frames
+        frames.append(bytes(buf[start:end + 2]))
+        del buf[:end + 2]
+
+class FrameBroadcast:
+    """Latest-frame slot shared by every stream client; each client waits for a newer seq.
+
+    Everything runs on the event loop, so publishing is just swapping in a new
+    frame and setting the Event that all waiting clients share.
+    """
+    def __init__(self):
+        self.latest = None
+        self.seq = 0
+        self._new_frame = asyncio.Event()
+
+    def publish(self, jpeg):
+        self.latest = jpeg
+        self.seq += 1
+        self._new_frame.set()
+        self._new_frame = asyncio.Event()  # Next frame wakes a fresh set of waiters
+
+    async def wait(self, last_seq, timeout=FRAME_WAIT_TIMEOUT):
+        """Return (seq, jpeg) once seq moves past last_seq; seq is unchanged on timeout."""
+        if self.seq == last_seq:
+            try:
+                await asyncio.wait_for(self._new_frame.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.seq, self.latest
+
 class FFmpegStreamer:
-    def __init__(self, port, device='/dev/video0', framerate='25', video_size='640x480'):
-        self.port = port
+    """Runs FFmpeg with MJPEG on its stdout and publishes each JPEG to frames."""
+    def __init__(self, frames, device='/dev/video0', framerate='25', video_size='640x480', camera_mjpeg=False):
+        self.frames = frames
         self.device = device
         self.framerate = framerate
         self.video_size = video_size
+        self.camera_mjpeg = camera_mjpeg  # Pass the camera's own JPEGs through instead of encoding
         self.process = None
         self.running = False
+        self.tasks = []
 
     def get_ffmpeg_command(self):
+        if self.camera_mjpeg:
+            # The camera's hardware encoder does the work; FFmpeg only copies packets
+            input_format, encode = ['-input_format', 'mjpeg'], ['-c:v', 'copy']
+        else:
+            input_format, encode = [], ['-q:v', '5']
         return [
             'ffmpeg',
+            '-loglevel', 'error', '-nostats',  # Keep stderr quiet; only errors are read back
+            # Hand each captured frame straight through: no input buffering or probing
+            '-fflags', 'nobuffer',
+            '-flags', 'low_delay',
+            '-probesize', '32',
+            '-analyzeduration', '0',
             '-f', 'v4l2',
-            '-i', self.device,
+            *input_format,
             '-framerate', self.framerate,
             '-video_size', self.video_size,
+            '-i', self.device,
+            '-an',
+            '-vsync', '0',           # Never duplicate frames to catch up
             '-f', 'mjpeg',
-            f'http://127.0.0.1:{self.port}/feed.mjpg'
+            *encode,
+            '-flush_packets', '1',   # Write every JPEG to the pipe as soon as it is encoded
+            'pipe:1'
         ]
 
-    def start(self):
+    async def start(self):
         if self.running:
             logger.warning("FFmpeg is already running.")
             return
-        logger.info(f"Starting FFmpeg stream on port {self.port}...")
+        logger.info(f"Starting FFmpeg capture from {self.device}...")
         try:
-            self.process = subprocess.Popen(
-                self.get_ffmpeg_command(),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=subprocess.os.setsid
+            self.process = await asyncio.create_subprocess_exec(
+                *self.get_ffmpeg_command(),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True
             )
             self.running = True
-            threading.Thread(target=self._check_ffmpeg_output, daemon=True).start()
+            self.tasks = [
+                asyncio.create_task(self._read_frames()),
+                asyncio.create_task(self._check_ffmpeg_output()),
+            ]
         except Exception as e:
             logger.error(f"Failed to start FFmpeg: {e}")
             self.running = False
 
-    def _check_ffmpeg_output(self):
-        stdout, stderr = self.process.communicate()
-        if self.process.returncode != 0:
+    async def _read_frames(self):
+        """Slice FFmpeg's MJPEG output into JPEGs and publish each one."""
+        buf = bytearray()
+        while True:
+            data = await self.process.stdout.read(65536)
+            if not data:
+                return  # FFmpeg exited
+            buf += data
+            for jpeg in extract_jpegs(buf):
+                self.frames.publish(jpeg)
+
+    async def _check_ffmpeg_output(self):
+        stderr = await self.process.stderr.read()
+        await self.process.wait()
+        if self.process.returncode != 0 and self.running:
             logger.error(f"FFmpeg error: {stderr.decode().strip()}")
             self.running = False
         else:
             logger.info("FFmpeg exited cleanly.")
 
-    def stop(self):
+    async def stop(self):
         if self.running and self.process:
             logger.info("Stopping FFmpeg...")
+            self.running = False
             try:
-                subprocess.os.killpg(subprocess.os.getpgid(self.process.pid), signal.SIGTERM)
-                self.process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
+                os.killpg(os.getpgid(self.process.pid), signal.SIGTERM)
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except ProcessLookupError:
+                pass  # Already gone
+            except asyncio.TimeoutError:
                 logger.warning("FFmpeg did not terminate with SIGTERM, sending SIGKILL...")
-                subprocess.os.killpg(subprocess.os.getpgid(self.process.pid), signal.SIGKILL)
-                self.process.wait()
-            self.running = False
+                os.killpg(os.getpgid(self.process.pid), signal.SIGKILL)
+                await self.process.wait()
             logger.info("FFmpeg stopped.")
+        for task in self.tasks:
+            task.cancel()
 
-class StreamHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        self.stream_queue = kwargs.pop('stream_queue', None)
-        super().__init__(*args, **kwargs)
-
-    def do_GET(self):
-        if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            html = f'''
-            <html>
-            <head>
-                <title>Live Webcam Feed</title>
-            </head>
-            <body>
-                <h1>Live Webcam Feed</h1>
-                <img src="/feed.mjpg" alt="Live Video Stream">
-            </body>
-            </html>
-            '''.encode('utf-8')
-            self.wfile.write(html)
-        elif self.path == '/feed.mjpg':
-            self.send_response(200)
-            self.send_header('Content-type', 'multipart/x-mixed-replace; boundary=frame')
-            self.end_headers()
-            while True:
-                try:
-                    data = self.stream_queue.get(timeout=5)  # Wait for data from FFmpeg
-                    if not data:
-                        break
-                    self.wfile.write(b'--frame\r\n')
-                    self.wfile.write(b'Content-Type: image/jpeg\r\n\r\n')
-                    self.wfile.write(data)
-                    self.wfile.write(b'\r\n')
-                except Queue.Empty:
-                    logger.warning("No stream data available, waiting...")
-                    continue
-                except BrokenPipeError:
-                    logger.info("Client disconnected from stream.")
-                    break
-                except Exception as e:
-                    logger.error(f"Error streaming to client: {e}")
-                    break
-        else:
-            self.send_error(404)
-
-    def do_POST(self):
-        if self.path == '/feed.mjpg':
-            self.send_response(200)
-            self.send_header('Content-type', 'multipart/x-mixed-replace; boundary=frame')
-            self.end_headers()
-            while True:
-                try:
-                    data = self.rfile.read(1024)
-                    if not data:
-                        break
-                    self.stream_queue.put(data)  # Share data with GET clients
-                except BrokenPipeError:
-                    logger.info("FFmpeg disconnected from server.")
-                    break
-                except Exception as e:
-                    logger.error(f"Error receiving FFmpeg stream: {e}")
-                    break
-        else:
-            self.send_error(501, "Unsupported method")
+# =================== Web App =================== #
+# Every client is a coroutine on one event loop, not a thread
+frames = FrameBroadcast()
+app = Quart(__name__)
+
+@app.route('/')
+async def index():
+    return Response(INDEX_HTML, mimetype='text/html')
+
+@app.route('/feed.mjpg')
+async def feed():
+    async def parts():
+        last_seq = 0
+        while True:
+            # Always the newest frame: a slow client skips frames instead of queuing them
+            seq, jpeg = await frames.wait(last_seq)
+            if seq == last_seq:
+                logger.warning("No stream data available, waiting...")
+                continue
+            last_seq = seq
+            yield PART_HEADER + jpeg + b'\r\n'
+
+    response = Response(parts(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    response.timeout = None  # Stream until the client disconnects
+    return response
 
 class WebcamServer:
-    def __init__(self, start_port):
+    def __init__(self, start_port, camera_mjpeg=False):
         self.start_port = start_port
+        self.camera_mjpeg = camera_mjpeg
         self.port = None
-        self.httpd = None
         self.streamer = None
-        self.server_thread = None
-        self.stream_queue = Queue()
 
     def find_available_port(self):
         port = self.start_port
@@ -175,57 +228,35 @@ def find_available_port(self):
                     logger.warning(f"Port {port} is in use, trying {port + 1}...")
                     port += 1
 
-    def start(self):
+    async def run(self):
+        """Start FFmpeg and serve the feed until Ctrl+C."""
         self.port = self.find_available_port()
-        
-        # Start HTTP server
+        self.streamer = FFmpegStreamer(frames, camera_mjpeg=self.camera_mjpeg)
+        await self.streamer.start()
+
+        config = Config()
+        config.bind = [f"0.0.0.0:{self.port}"]
+        config.accesslog = None  # No per-request access log on stderr
+        logger.info(f"Serving webpage at http://0.0.0.0:{self.port}")
         try:
-            handler = lambda *args, **kwargs: StreamHandler(*args, stream_queue=self.stream_queue, **kwargs)
-            self.httpd = socketserver.ThreadingTCPServer(("", self.port), handler)
-            self.server_thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
-            self.server_thread.start()
-            logger.info(f"Serving webpage at http://0.0.0.0:{self.port}")
-        except Exception as e:
-            logger.error(f"Failed to start HTTP server: {e}")
-            sys.exit(1)
-
-        # Start FFmpeg after HTTP server is running
-        self.streamer = FFmpegStreamer(self.port)
-        time.sleep(1)  # Ensure server is ready
-        self.streamer.start()
-
-    def stop(self):
-        if self.streamer:
-            self.streamer.stop()
-        if self.httpd:
-            logger.info("Shutting down HTTP server...")
-            self.httpd.shutdown()
-            self.httpd.server_close()
-            if self.server_thread:
-                self.server_thread.join(timeout=5)
-                if self.server_thread.is_alive():
-                    logger.warning("Server thread did not terminate, forcing exit.")
+            # Hypercorn installs its own SIGINT/SIGTERM handlers and returns on shutdown
+            await serve(app, config)
+        finally:
+            logger.info("Shutting down...")
+            await self.streamer.stop()
             logger.info("HTTP server stopped.")
 
-def signal_handler(sig, frame, server):
-    logger.info("Received Ctrl+C, shutting down...")
-    server.stop()
-    sys.exit(0)
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Stream webcam feed over the web.")
     parser.add_argument('--port', type=int, default=6000, help="Starting port number (default: 6000)")
+    parser.add_argument('--camera-mjpeg', action='store_true',
+                        help="Stream the camera's own MJPEG output instead of encoding on the CPU")
     args = parser.parse_args()
 
-    server = WebcamServer(start_port=args.port)
-    
-    signal.signal(signal.SIGINT, lambda sig, frame: signal_handler(sig, frame, server))
-    
+    server = WebcamServer(start_port=args.port, camera_mjpeg=args.camera_mjpeg)
+
     try:
-        server.start()
-        while True:
-            threading.Event().wait()
+        asyncio.run(server.run())
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        server.stop()
-        sys.exit(1) 
\ No newline at end of file
+        sys.exit(1)